@@ -0,0 +1,136 @@
+# admission_control.py
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Optional
+
+from config import ADMISSION_MAX_IN_FLIGHT, ADMISSION_MAX_QUEUE, ADMISSION_SHED_POLICY
+
+
+class AdmissionRejected(Exception):
+    """대기열이 가득 차서 요청을 받을 수 없을 때 발생합니다."""
+
+
+@dataclass
+class Ticket:
+    seq: int
+    downgraded: bool = False  # 과부하로 축소 모드(선택 단계 생략)로 실행
+    enqueued_at: float = field(default_factory=time.monotonic)
+    admitted_at: Optional[float] = None
+    released: bool = False
+
+    @property
+    def admitted(self) -> bool:
+        return self.admitted_at is not None
+
+
+class AdmissionController:
+    """
+    프로세스 전체에서 동시에 실행되는 파이프라인 수를 제한합니다.
+    Streamlit 세션은 각자 다른 스레드와 이벤트 루프에서 실행되므로 스레드 잠금으로 구현합니다.
+    실행 슬롯이 없으면 요청 순서대로(FIFO) 대기하며, 대기열이 max_queue를 넘으면
+    shed_policy에 따라 거절("reject")하거나 축소 모드로 대기열에 넣습니다("downgrade", 최대 2배까지).
+    """
+
+    def __init__(self, max_in_flight: int = ADMISSION_MAX_IN_FLIGHT, max_queue: int = ADMISSION_MAX_QUEUE,
+                 shed_policy: str = ADMISSION_SHED_POLICY):
+        if shed_policy not in ("reject", "downgrade"):
+            raise ValueError(f"지원하지 않는 부하 차단 정책입니다: {shed_policy}")
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.shed_policy = shed_policy
+        self._lock = threading.Lock()
+        self._queue: Deque[Ticket] = deque()
+        self._in_flight = 0
+        self._seq = itertools.count(1)
+        self.admitted_total = 0
+        self.rejected = 0
+        self.downgraded = 0
+        self._wait_total = 0.0
+
+    def enqueue(self) -> Ticket:
+        """
+        실행을 요청합니다. 슬롯이 비어 있으면 바로 승인된 티켓을, 아니면 대기 중인 티켓을 반환합니다.
+        :raises AdmissionRejected: 대기열이 가득 찬 경우
+        """
+        with self._lock:
+            ticket = Ticket(seq=next(self._seq))
+            if self._in_flight >= self.max_in_flight and len(self._queue) >= self.max_queue:
+                if self.shed_policy == "reject" or len(self._queue) >= self.max_queue * 2:
+                    self.rejected += 1
+                    logging.warning(f"대기열 초과로 요청을 거절합니다 (대기 {len(self._queue)}건)")
+                    raise AdmissionRejected("현재 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.")
+                ticket.downgraded = True
+                self.downgraded += 1
+            self._queue.append(ticket)
+            self._admit_waiting()
+            return ticket
+
+    def position(self, ticket: Ticket) -> int:
+        """대기 순번 (1부터, 승인되었으면 0)."""
+        with self._lock:
+            if ticket.admitted:
+                return 0
+            for index, queued in enumerate(self._queue):
+                if queued is ticket:
+                    return index + 1
+            return 0
+
+    async def wait_admitted(self, ticket: Ticket, on_position: Optional[Callable[[int], None]] = None,
+                            interval: float = 0.5) -> None:
+        """
+        티켓이 승인될 때까지 기다립니다.
+        :param on_position: 대기 순번이 바뀔 때마다 호출되는 콜백 (화면에 순번 표시용, 대기 후 승인되면 0)
+        """
+        last_position = None
+        while not ticket.admitted:
+            position = self.position(ticket)
+            if on_position is not None and position != last_position:
+                on_position(position)
+                last_position = position
+            await asyncio.sleep(interval)
+        if on_position is not None and last_position is not None:
+            on_position(0)
+
+    def release(self, ticket: Ticket) -> None:
+        """실행이 끝났거나 대기 중에 요청이 취소되었을 때 호출합니다 (여러 번 호출해도 안전)."""
+        with self._lock:
+            if ticket.released:
+                return
+            ticket.released = True
+            if ticket.admitted:
+                self._in_flight -= 1
+            else:
+                self._queue.remove(ticket)
+            self._admit_waiting()
+
+    def _admit_waiting(self) -> None:
+        # 잠금 안에서 호출
+        while self._queue and self._in_flight < self.max_in_flight:
+            ticket = self._queue.popleft()
+            ticket.admitted_at = time.monotonic()
+            self._in_flight += 1
+            self.admitted_total += 1
+            self._wait_total += ticket.admitted_at - ticket.enqueued_at
+
+    @property
+    def overloaded(self) -> bool:
+        """대기 중인 요청이 있는지 (추측 실행 등 부가 작업을 줄이는 데 사용)."""
+        with self._lock:
+            return bool(self._queue)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "queued": len(self._queue),
+                "admitted": self.admitted_total,
+                "rejected": self.rejected,
+                "downgraded": self.downgraded,
+                "avg_wait_seconds": round(self._wait_total / self.admitted_total, 2) if self.admitted_total else 0.0,
+            }
@@ -1,14 +1,26 @@
-from typing import Tuple
+from typing import Tuple, List, Dict, Any, Optional
 from custom_agent import CustomAgent, ReportAgent
-from config import initialize_llm
+from config import initialize_llm, AGENT_MODELS, AGENT_TOOLS, PRODUCT_CATALOG_PATH, RETRIEVAL_INDEX_DIR, RETRIEVAL_USE_ANN, REPORT_MODE
 from langchain.tools import Tool
 from langchain_community.tools import DuckDuckGoSearchRun
 from langchain_community.tools.youtube.search import YouTubeSearchTool
 from langchain_community.tools import ArxivQueryRun
 from prompts import USER_ANALYST_PROMPT, TREND_ANALYST_PROMPT, STYLIST_PROMPT, REPORT_AGENT_PROMPT
 from user_input import UserInput
+from product_catalog import load_catalog, create_catalog_tool
+from outfit_optimizer import create_outfit_optimizer_tool
+from retrieval_index import load_knowledge_base
+from stage_cache import stage_view
+from cassette import get_active_cassette
+from structured_output import STAGE_SCHEMAS, format_instructions
+import logging
+import os
 
-async def create_agents(api_key: str, user_info: UserInput, current_date: str) -> Tuple[CustomAgent, CustomAgent, CustomAgent, ReportAgent]:
+def create_tools() -> List[Tool]:
+    """
+    에이전트가 사용하는 도구를 생성합니다. 요청 간에 재사용할 수 있습니다.
+    :return: 도구 리스트 (에이전트별 도구는 tools_for_agent로 선택)
+    """
     ddg_search = DuckDuckGoSearchRun()
     youtube_search = YouTubeSearchTool()
     arxiv = ArxivQueryRun()
@@ -31,48 +43,126 @@ async def create_agents(api_key: str, user_info: UserInput, current_date: str) -
         )
     ]
 
-    user_info_dict = user_info.__dict__
-    user_info_dict['current_date'] = current_date
+    # 웹 검색 결과를 로컬 인덱스에 축적하고, 반복되는 검색어는 인덱스에서 바로 응답
+    if RETRIEVAL_INDEX_DIR:
+        knowledge_base = load_knowledge_base(RETRIEVAL_INDEX_DIR, RETRIEVAL_USE_ANN)
+        tools = [knowledge_base.cached_tool(tool) for tool in tools] + [knowledge_base.as_tool()]
 
-    user_analyst_llm = await initialize_llm(api_key, "user_analyst")
-    trend_analyst_llm = await initialize_llm(api_key, "trend_analyst")
-    stylist_llm = await initialize_llm(api_key, "stylist")
-    report_agent_llm = await initialize_llm(api_key, "report_agent")
+    # 로컬 상품 카탈로그가 설정되어 있으면 가격/브랜드 조회용 도구로 추가
+    if PRODUCT_CATALOG_PATH and os.path.exists(PRODUCT_CATALOG_PATH):
+        catalog = load_catalog(PRODUCT_CATALOG_PATH)
+        tools.append(create_catalog_tool(catalog))
+        tools.append(create_outfit_optimizer_tool(catalog))
+    elif PRODUCT_CATALOG_PATH:
+        logging.warning(f"상품 카탈로그 파일을 찾을 수 없습니다: {PRODUCT_CATALOG_PATH}")
 
-    user_analyst = CustomAgent(
+    # 카세트가 활성화되어 있으면 도구 호출을 기록하거나 기록된 결과로 재생
+    cassette = get_active_cassette()
+    if cassette is not None:
+        tools = [cassette.wrap_tool(tool) for tool in tools]
+
+    return tools
+
+def tools_for_agent(agent_name: str, tools: List[Tool]) -> List[Tool]:
+    """config.AGENT_TOOLS에서 해당 에이전트에 허용된 도구만 반환합니다."""
+    allowed = AGENT_TOOLS.get(agent_name)
+    if allowed is None:
+        return list(tools)
+    return [tool for tool in tools if tool.name in allowed]
+
+async def create_llms(api_key: str) -> Dict[str, Any]:
+    """
+    에이전트별 LLM 클라이언트를 생성합니다. 요청 간에 재사용할 수 있습니다.
+    :return: 에이전트 이름 -> LLM 객체
+    """
+    return {agent_name: await initialize_llm(api_key, agent_name) for agent_name in AGENT_MODELS}
+
+# 파이프라인 단계별 에이전트 설정
+AGENT_SPECS: Dict[str, Dict[str, Any]] = {
+    "user_analysis": dict(
+        agent_class=CustomAgent,
+        agent_name="user_analyst",
         role="사용자 분석가",
         goal="사용자의 체형, 스타일, 퍼스널 컬러를 정확히 분석합니다.",
         backstory="당신은 패션 업계에서 20년 이상의 경력을 가진 전문 이미지 컨설턴트입니다.",
-        llm=user_analyst_llm,
-        tools=tools,
-        prompt=USER_ANALYST_PROMPT.format(**user_info_dict)
-    )
-
-    trend_analyst = CustomAgent(
+        prompt=USER_ANALYST_PROMPT
+    ),
+    "trend_analysis": dict(
+        agent_class=CustomAgent,
+        agent_name="trend_analyst",
         role="트렌드 분석가",
         goal="최신 패션 트렌드를 분석하고 스타일리스트에게 정보를 제공합니다.",
         backstory="당신은 세계적인 패션 매거진의 수석 에디터로, 글로벌 패션 트렌드를 분석하는 전문가입니다.",
-        llm=trend_analyst_llm,
-        tools=tools,
-        prompt=TREND_ANALYST_PROMPT.format(**user_info_dict)
-    )
-
-    stylist = CustomAgent(
+        prompt=TREND_ANALYST_PROMPT
+    ),
+    "style_recommendations": dict(
+        agent_class=CustomAgent,
+        agent_name="stylist",
         role="AI 스타일리스트",
         goal="사용자에게 최적화된 패션 스타일과 아이템을 추천합니다.",
         backstory="당신은 셀러브리티들의 스타일링을 담당하는 최고의 패션 스타일리스트입니다.",
-        llm=stylist_llm,
-        tools=tools,
-        prompt=STYLIST_PROMPT.format(**user_info_dict)
-    )
-
-    report_agent = ReportAgent(
+        prompt=STYLIST_PROMPT
+    ),
+    "final_report": dict(
+        agent_class=ReportAgent,
+        agent_name="report_agent",
         role="리포트 작성자",
         goal="다른 에이전트들의 분석 결과를 종합하여 가독성 높은 패션 분석 및 추천 보고서를 작성합니다.",
         backstory="당신은 패션 업계의 전문 리포트 작성자로, 복잡한 정보를 명확하고 실용적인 보고서로 정리하는 능력이 뛰어납니다.",
-        llm=report_agent_llm,
+        prompt=REPORT_AGENT_PROMPT
+    ),
+}
+
+async def create_agent(
+    stage: str,
+    api_key: str,
+    user_info: UserInput,
+    current_date: str,
+    llms: Optional[Dict[str, Any]] = None,
+    tools: Optional[List[Tool]] = None
+) -> CustomAgent:
+    """
+    파이프라인 단계 하나의 에이전트를 생성합니다.
+    프롬프트는 해당 단계가 선언한 사용자 정보 필드(STAGE_FIELDS)만으로 구성되며,
+    REPORT_MODE=template이면 분석 단계의 출력 형식(JSON 스키마) 지시문이 추가됩니다.
+    :param stage: 파이프라인 단계 이름 (AGENT_SPECS의 키)
+    :param llms: 공유 LLM 클라이언트 (없으면 해당 에이전트의 LLM만 새로 생성)
+    :param tools: 공유 도구 (없으면 새로 생성)
+    """
+    spec = AGENT_SPECS[stage]
+    if tools is None:
+        tools = create_tools()
+    tools = tools_for_agent(spec["agent_name"], tools)
+    llm = (llms or {}).get(spec["agent_name"]) or await initialize_llm(api_key, spec["agent_name"])
+    prompt = spec["prompt"].format_map(stage_view(stage, user_info, current_date))
+    if REPORT_MODE == "template" and stage in STAGE_SCHEMAS:
+        prompt += format_instructions(stage)
+
+    return spec["agent_class"](
+        role=spec["role"],
+        goal=spec["goal"],
+        backstory=spec["backstory"],
+        llm=llm,
         tools=tools,
-        prompt=REPORT_AGENT_PROMPT.format(**user_info_dict)
+        prompt=prompt
     )
 
-    return user_analyst, trend_analyst, stylist, report_agent
\ No newline at end of file
+async def create_agents(
+    api_key: str,
+    user_info: UserInput,
+    current_date: str,
+    llms: Optional[Dict[str, Any]] = None,
+    tools: Optional[List[Tool]] = None
+) -> Tuple[CustomAgent, CustomAgent, CustomAgent, ReportAgent]:
+    """
+    사용자 정보로 프롬프트를 구성한 에이전트들을 생성합니다.
+    llms와 tools를 넘기면 새로 만들지 않고 공유 클라이언트를 사용합니다.
+    """
+    if tools is None:
+        tools = create_tools()
+    if llms is None:
+        llms = await create_llms(api_key)
+    return tuple([
+        await create_agent(stage, api_key, user_info, current_date, llms, tools)
+        for stage in ("user_analysis", "trend_analysis", "style_recommendations", "final_report")
+    ])
@@ -0,0 +1,271 @@
+# api_server.py
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+from dotenv import load_dotenv
+
+from agent_config import create_llms, create_tools
+from config import API_QUEUE_SIZE, API_WORKERS, LLM_BACKEND
+from pipeline import display_output, run_pipeline
+from result_writer import ResultWriter
+from stage_cache import STAGE_CACHE
+from user_input import UserInput
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# 환경 변수 로드
+load_dotenv()
+
+# 메모리에 보관하는 완료된 작업의 최대 수
+MAX_RETAINED_JOBS = 1000
+REQUIRED_FIELDS = {"gender": str, "height": float, "weight": float, "budget": int, "tpo": str, "situation": str}
+# 숫자 항목의 허용 범위 (앱 입력 폼과 동일, None은 상한 없음)
+FIELD_RANGES = {"height": (140.0, 200.0), "weight": (30.0, 150.0), "budget": (1, None)}
+
+
+@dataclass
+class Job:
+    job_id: str
+    user_info: UserInput
+    status: str = "queued"  # queued / running / completed / failed
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    results: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+    files: List[str] = field(default_factory=list)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """스트리밍 구독자에게 새 이벤트를 알립니다."""
+        self.events.append(event)
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "completed_stages": list(self.results),
+            "error": self.error,
+            "files": self.files,
+        }
+
+
+class RecommendationService:
+    """
+    추천 파이프라인을 대기열과 고정된 수의 워커로 실행합니다.
+    LLM 클라이언트와 도구는 시작 시 한 번 생성하여 모든 요청이 공유합니다.
+    """
+
+    def __init__(self, api_key: str, workers: int = API_WORKERS, queue_size: int = API_QUEUE_SIZE):
+        self.api_key = api_key
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.llms: Dict[str, Any] = {}
+        self.tools: List[Any] = []
+        self._worker_tasks: List[asyncio.Task] = []
+        # 요청이 몰릴 때 결과 파일 쓰기를 모아서 처리
+        self.writer = ResultWriter(batch=True)
+
+    async def start(self, app: web.Application) -> None:
+        self.llms = await create_llms(self.api_key)
+        self.tools = create_tools()
+        self._worker_tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logging.info(f"추천 서비스 시작: 워커 {self.workers}개, 대기열 {self.queue.maxsize}개, LLM 백엔드 {LLM_BACKEND}")
+
+    async def stop(self, app: web.Application) -> None:
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        await self.writer.close()
+
+    def submit(self, user_info: UserInput) -> Job:
+        job = Job(job_id=uuid.uuid4().hex, user_info=user_info)
+        self.queue.put_nowait(job)  # 대기열이 가득 차면 asyncio.QueueFull
+        self.jobs[job.job_id] = job
+        self._evict_finished_jobs()
+        return job
+
+    def _evict_finished_jobs(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in ("completed", "failed")]
+        for job_id in finished[:max(0, len(self.jobs) - MAX_RETAINED_JOBS)]:
+            del self.jobs[job_id]
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.publish({"event": "started"})
+        current_date = datetime.now().strftime("%Y년 %m월 %d일")
+
+        def on_stage_complete(stage: str, output: str) -> None:
+            # 분석 단계의 구조화 출력(JSON)은 최종 결과와 같은 Markdown으로 변환하여 전달
+            output = display_output(stage, output, job.user_info, current_date)
+            job.results[stage] = output
+            job.publish({"event": "stage_completed", "stage": stage, "output": output})
+
+        def on_stage_failed(stage: str, error: Exception) -> None:
+            job.publish({"event": "stage_failed", "stage": stage, "error": str(error)})
+
+        try:
+            # 선택 단계나 보고서 단계가 실패하면 대체 결과가 포함됨
+            job.results = await run_pipeline(
+                self.api_key, job.user_info, current_date, llms=self.llms, tools=self.tools,
+                on_stage_complete=on_stage_complete, cache=STAGE_CACHE, on_stage_failed=on_stage_failed
+            )
+        except Exception as e:
+            logging.error(f"추천 작업 {job.job_id} 실패: {str(e)}")
+            job.status = "failed"
+            job.error = str(e)
+            job.publish({"event": "failed", "error": str(e)})
+            return
+
+        try:
+            job.files = await self.writer.write(job.results, job.user_info.situation)
+        except Exception as e:
+            logging.warning(f"추천 작업 {job.job_id} 결과 저장 실패: {str(e)}")
+        job.status = "completed"
+        job.publish({"event": "completed", "files": job.files})
+
+    def queue_position(self, job: Job) -> Optional[int]:
+        if job.status != "queued":
+            return None
+        queued = [j for j in self.jobs.values() if j.status == "queued"]
+        return queued.index(job) + 1
+
+
+def _json_response(data: Dict[str, Any], status: int = 200, **kwargs) -> web.Response:
+    return web.json_response(data, status=status, dumps=lambda obj: json.dumps(obj, ensure_ascii=False), **kwargs)
+
+
+def parse_user_info(payload: Any) -> UserInput:
+    """요청 본문을 검증하여 UserInput으로 변환합니다."""
+    if not isinstance(payload, dict):
+        raise ValueError("요청 본문은 JSON 객체여야 합니다.")
+    values = {}
+    for name, cast in REQUIRED_FIELDS.items():
+        value = payload.get(name)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            raise ValueError(f"필수 항목이 없습니다: {name}")
+        # bool은 int의 하위 타입이라 숫자로 변환되므로 따로 거절
+        if isinstance(value, bool) or (cast is str and not isinstance(value, str)):
+            raise ValueError(f"잘못된 값입니다: {name}")
+        if cast is str:
+            values[name] = value.strip()
+            continue
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"잘못된 값입니다: {name}")
+        low, high = FIELD_RANGES[name]
+        if not math.isfinite(number) or number < low or (high is not None and number > high):
+            limit = f"{low} 이상" if high is None else f"{low}~{high}"
+            raise ValueError(f"잘못된 값입니다: {name} ({limit} 범위여야 합니다)")
+        values[name] = cast(number)
+    return UserInput(image_paths=[], **values)
+
+
+def _get_job(request: web.Request) -> Job:
+    job = request.app["service"].jobs.get(request.match_info["job_id"])
+    if job is None:
+        raise web.HTTPNotFound(text=json.dumps({"error": "작업을 찾을 수 없습니다."}, ensure_ascii=False),
+                               content_type="application/json")
+    return job
+
+
+async def submit_handler(request: web.Request) -> web.Response:
+    service: RecommendationService = request.app["service"]
+    try:
+        user_info = parse_user_info(await request.json())
+    except (json.JSONDecodeError, ValueError) as e:
+        return _json_response({"error": str(e)}, status=400)
+    try:
+        job = service.submit(user_info)
+    except asyncio.QueueFull:
+        return _json_response({"error": "대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요."}, status=503,
+                              headers={"Retry-After": "5"})
+    return _json_response(dict(job.summary(), queue_position=service.queue_position(job)), status=202)
+
+
+async def status_handler(request: web.Request) -> web.Response:
+    job = _get_job(request)
+    return _json_response(dict(job.summary(), queue_position=request.app["service"].queue_position(job)))
+
+
+async def result_handler(request: web.Request) -> web.Response:
+    job = _get_job(request)
+    if job.status == "completed":
+        return _json_response(dict(job.summary(), results=job.results))
+    if job.status == "failed":
+        return _json_response(job.summary(), status=500)
+    return _json_response(job.summary(), status=202)
+
+
+async def stream_handler(request: web.Request) -> web.StreamResponse:
+    """단계별 결과를 완료되는 대로 NDJSON 한 줄씩 전송합니다."""
+    job = _get_job(request)
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    sent = 0
+    while True:
+        changed = job.changed
+        for event in job.events[sent:]:
+            await response.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+        sent = len(job.events)
+        if job.status in ("completed", "failed"):
+            break
+        await changed.wait()
+    await response.write_eof()
+    return response
+
+
+def create_app(api_key: str, workers: int = API_WORKERS, queue_size: int = API_QUEUE_SIZE) -> web.Application:
+    service = RecommendationService(api_key, workers, queue_size)
+    app = web.Application()
+    app["service"] = service
+    app.on_startup.append(service.start)
+    app.on_cleanup.append(service.stop)
+    app.router.add_post("/recommendations", submit_handler)
+    app.router.add_get("/recommendations/{job_id}", status_handler)
+    app.router.add_get("/recommendations/{job_id}/result", result_handler)
+    app.router.add_get("/recommendations/{job_id}/stream", stream_handler)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI 패션 스타일리스트 HTTP API 서버")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=API_WORKERS, help="동시에 실행할 파이프라인 수")
+    parser.add_argument("--queue-size", type=int, default=API_QUEUE_SIZE, help="대기열 최대 크기")
+    args = parser.parse_args()
+
+    api_key = os.getenv('GROQ_API_KEY')
+    if not api_key and LLM_BACKEND != "fake":
+        raise ValueError("GROQ_API_KEY not found in environment variables")
+
+    web.run_app(create_app(api_key or "", args.workers, args.queue_size), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
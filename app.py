@@ -1,15 +1,26 @@
 import streamlit as st
+import argparse
 import asyncio
 import time
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable
 import os
 from dataclasses import dataclass
 import logging
+import uuid
 from pathlib import Path
 from dotenv import load_dotenv
 
-from agent_config import create_agents
+from admission_control import AdmissionController, AdmissionRejected
+from cassette import Cassette, add_cassette_arguments, cassette_from_args, get_active_cassette
+from config import MEMORY_PROFILING, SPECULATIVE_PREFETCH
+from memory_monitor import (
+    load_session_results, memory_report, release_session_results, start_profiling, store_session_results
+)
+from pipeline import OPTIONAL_STAGES, run_pipeline
+from result_writer import ResultStore
+from speculation import SpeculativeExecutor
+from stage_cache import STAGE_CACHE
 from user_input import UserInput
 
 # 환경 변수 로드
@@ -21,6 +32,43 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# 세션 상태에 두기에 큰 결과를 보관하는 저장소
+RESULT_STORE = ResultStore()
+
+@st.cache_resource
+def load_cassette() -> Optional[Cassette]:
+    """
+    `streamlit run app.py -- --record PATH` 또는 `-- --replay PATH`로 지정한 카세트를 프로세스당 한 번 활성화합니다.
+    """
+    parser = argparse.ArgumentParser()
+    add_cassette_arguments(parser)
+    args, _ = parser.parse_known_args()
+    cassette = cassette_from_args(args)
+    if cassette is not None and cassette.mode == "record":
+        cassette.metadata["current_date"] = datetime.now().strftime("%Y년 %m월 %d일")
+    return cassette
+
+def is_replaying() -> bool:
+    cassette = get_active_cassette()
+    return cassette is not None and cassette.mode == "replay"
+
+def current_date_text() -> str:
+    # 카세트 사용 시 기록 당시의 날짜로 프롬프트를 구성해야 같은 요청이 재현됨
+    cassette = get_active_cassette()
+    if cassette is not None and "current_date" in cassette.metadata:
+        return cassette.metadata["current_date"]
+    return datetime.now().strftime("%Y년 %m월 %d일")
+
+@st.cache_resource
+def get_speculative_executor(api_key: str) -> SpeculativeExecutor:
+    """모든 세션이 공유하는 추측 실행기를 반환합니다."""
+    return SpeculativeExecutor(api_key)
+
+@st.cache_resource
+def get_admission_controller() -> AdmissionController:
+    """모든 세션이 공유하는 파이프라인 실행 제한기를 반환합니다."""
+    return AdmissionController()
+
 @dataclass
 class UserProfile:
     gender: str
@@ -92,63 +140,53 @@ class ImageProcessor:
         self.uploaded_images.clear()
 
 class StyleAdvisor:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, speculator: Optional[SpeculativeExecutor] = None, session_id: Optional[str] = None,
+                 admission: Optional[AdmissionController] = None):
         self.api_key = api_key
-        self.current_date = datetime.now().strftime("%Y년 %m월 %d일")
+        self.current_date = current_date_text()
+        self.speculator = speculator
+        self.session_id = session_id
+        self.admission = admission
+        self.downgraded = False
 
-    async def generate_recommendations(self, user_profile: UserProfile) -> Dict[str, Any]:
+    async def generate_recommendations(self, user_profile: UserProfile,
+                                       on_queue_position: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+        """
+        추천을 생성합니다. admission이 주어지면 실행 슬롯을 얻을 때까지 순서대로 기다립니다.
+        :param on_queue_position: 대기 순번이 바뀔 때마다 호출되는 콜백 (대기 후 승인되면 0)
+        :raises AdmissionRejected: 대기열이 가득 차 요청이 거절된 경우
+        """
+        if self.admission is None:
+            return await self._run(user_profile)
+        ticket = self.admission.enqueue()
+        try:
+            await self.admission.wait_admitted(ticket, on_queue_position)
+            self.downgraded = ticket.downgraded
+            logging.info(f"파이프라인 실행 승인 (축소 모드: {ticket.downgraded}), 실행 제한 통계: {self.admission.stats()}")
+            return await self._run(user_profile)
+        finally:
+            # 실행이 끝나거나 대기 중에 세션이 중단되면 슬롯/대기열 자리를 반환
+            self.admission.release(ticket)
+
+    async def _run(self, user_profile: UserProfile) -> Dict[str, Any]:
         try:
             # UserInput 객체 생성
             user_info = UserInput(**user_profile.to_dict())
 
-            # 에이전트 생성
-            user_analyst, trend_analyst, stylist, report_agent = await create_agents(
-                self.api_key,
-                user_info,
-                self.current_date
+            # 입력 중에 미리 실행한 단계 중 제출된 입력과 일치하는 결과를 넘겨받음
+            prefetched = None
+            if self.speculator is not None:
+                prefetched = self.speculator.claim(self.session_id, user_info, self.current_date)
+                logging.info(f"추측 실행 통계: {self.speculator.stats()}")
+
+            # 세 분석을 병렬로 실행한 뒤 최종 보고서 생성
+            # 이전 요청과 비교해 바뀐 필드에 영향을 받는 단계만 다시 실행
+            # 과부하로 축소 모드가 되면 선택 단계(트렌드 분석)는 재사용할 결과가 있을 때만 포함
+            return await run_pipeline(
+                self.api_key, user_info, self.current_date, cache=STAGE_CACHE, prefetched=prefetched,
+                skip_stages=OPTIONAL_STAGES if self.downgraded else ()
             )
             
-            # 분석 태스크 정의
-            tasks = [
-                user_analyst.aplan(
-                    intermediate_steps=[],
-                    input=f"현재 날짜는 {self.current_date}입니다. "
-                          f"다음 사용자의 정보를 분석하여 체형, 스타일, 퍼스널 컬러를 파악합니다. "
-                          f"사용자 정보: 성별: {user_profile.gender}, "
-                          f"키: {user_profile.height}cm, 체중: {user_profile.weight}kg, "
-                          f"BMI: {user_profile.bmi:.1f}, "
-                          f"예산: {user_profile.budget}원, TPO: {user_profile.tpo}, "
-                          f"상황: {user_profile.situation}"
-                ),
-                trend_analyst.aplan(
-                    intermediate_steps=[],
-                    input=f"현재 날짜 {self.current_date} 기준으로 "
-                          f"최신 글로벌 및 한국 패션 트렌드를 조사하고 요약합니다. "
-                          f"사용자의 성별은 {user_profile.gender}입니다."
-                ),
-                stylist.aplan(
-                    intermediate_steps=[],
-                    input=f"사용자 정보와 현재 트렌드를 고려하여 개인화된 스타일과 아이템을 추천합니다. "
-                          f"예산 {user_profile.budget}원 내에서 구체적인 아이템과 "
-                          f"실제 구매 가능한 링크를 제공해야 합니다. "
-                          f"TPO: {user_profile.tpo}, 상황: {user_profile.situation}"
-                )
-            ]
-            
-            # 병렬로 분석 실행
-            results = await asyncio.gather(*tasks)
-            analyses = [result.return_values["output"] for result in results]
-            
-            # 최종 보고서 생성
-            final_report = await report_agent.compile_report(*analyses)
-            
-            return {
-                "user_analysis": analyses[0],
-                "trend_analysis": analyses[1],
-                "style_recommendations": analyses[2],
-                "final_report": final_report
-            }
-            
         except Exception as e:
             logging.error(f"Style recommendation generation failed: {str(e)}")
             raise
@@ -171,15 +209,37 @@ class StreamlitApp:
             st.session_state.user_profile = None
         if 'recommendations' not in st.session_state:
             st.session_state.recommendations = None
+        if 'session_id' not in st.session_state:
+            st.session_state.session_id = uuid.uuid4().hex
+
+    @staticmethod
+    def get_speculator() -> Optional[SpeculativeExecutor]:
+        api_key = os.getenv('GROQ_API_KEY')
+        if not SPECULATIVE_PREFETCH or not (api_key or is_replaying()):
+            return None
+        return get_speculative_executor(api_key or "")
     
     def render_user_input_form(self):
         st.title("AI 패션 스타일리스트 🎨")
+
+        # 성별은 폼 밖에서 입력받아, 사용자가 선택하는 즉시 성별과 날짜만 필요한 트렌드 분석을 미리 시작
+        # (기본값을 두지 않아 페이지를 열기만 한 세션은 추측 실행하지 않음)
+        gender = st.selectbox("성별", ["남성", "여성"], index=None, placeholder="성별을 선택하세요")
+        speculator = self.get_speculator()
+        if speculator is not None:
+            # 선택이 해제되었거나 실행을 기다리는 요청이 있으면 이 세션의 추측 실행을 취소
+            if gender is None or get_admission_controller().overloaded:
+                speculator.discard(st.session_state.session_id)
+            else:
+                speculator.speculate(
+                    st.session_state.session_id,
+                    {"gender": gender, "current_date": current_date_text()}
+                )
         
         with st.form("user_info_form"):
             col1, col2 = st.columns(2)
             
             with col1:
-                gender = st.selectbox("성별", ["남성", "여성"])
                 height = st.number_input("키 (cm)", min_value=140.0, max_value=200.0, value=170.0)
                 weight = st.number_input("체중 (kg)", min_value=30.0, max_value=150.0, value=65.0)
             
@@ -213,6 +273,9 @@ class StreamlitApp:
             submit_button = st.form_submit_button("스타일 분석 시작", use_container_width=True)
             
             if submit_button:
+                if not gender:
+                    st.error("성별을 선택해주세요.")
+                    return
                 if not situation or not tpo:
                     st.error("TPO와 구체적인 상황을 모두 입력해주세요.")
                     return
@@ -236,15 +299,23 @@ class StreamlitApp:
     async def generate_and_display_recommendations(self):
         try:
             api_key = os.getenv('GROQ_API_KEY')
-            if not api_key:
+            if not api_key and not is_replaying():
                 st.error("API 키가 설정되지 않았습니다. .env 파일을 확인해주세요.")
                 st.session_state.current_step = 0
                 return
                 
-            style_advisor = StyleAdvisor(api_key)
+            style_advisor = StyleAdvisor(
+                api_key or "", self.get_speculator(), st.session_state.session_id, get_admission_controller()
+            )
             
             progress_bar = st.progress(0)
             status_text = st.empty()
+
+            def show_queue_position(position: int) -> None:
+                if position:
+                    status_text.text(f"요청이 많아 대기 중입니다... (대기 순번: {position}번)")
+                else:
+                    status_text.text("체형 분석 중...")
             
             with st.spinner('AI 스타일리스트가 당신을 위한 최적의 스타일을 분석 중입니다...'):
                 try:
@@ -252,7 +323,7 @@ class StreamlitApp:
                     progress_bar.progress(25)
                     
                     recommendations = await style_advisor.generate_recommendations(
-                        st.session_state.user_profile
+                        st.session_state.user_profile, on_queue_position=show_queue_position
                     )
                     progress_bar.progress(50)
                     status_text.text("트렌드 분석 중...")
@@ -260,7 +331,7 @@ class StreamlitApp:
                     if recommendations:
                         progress_bar.progress(75)
                         status_text.text("스타일 추천 생성 중...")
-                        st.session_state.recommendations = recommendations
+                        store_session_results(st.session_state, 'recommendations', recommendations, RESULT_STORE)
                         
                         progress_bar.progress(100)
                         status_text.text("분석이 완료되었습니다!")
@@ -274,6 +345,11 @@ class StreamlitApp:
                     else:
                         raise ValueError("추천 결과가 생성되지 않았습니다.")
                         
+                except AdmissionRejected as e:
+                    status_text.empty()
+                    progress_bar.empty()
+                    st.warning(str(e))
+                    st.session_state.current_step = 0
                 except Exception as e:
                     st.error(f"스타일 분석 중 오류가 발생했습니다: {str(e)}")
                     logging.error(f"Recommendation generation error: {str(e)}")
@@ -286,12 +362,12 @@ class StreamlitApp:
     
     def display_results(self):
         try:
-            if not st.session_state.recommendations or not st.session_state.user_profile:
+            recommendations = load_session_results(st.session_state, 'recommendations', RESULT_STORE)
+            if not recommendations or not st.session_state.user_profile:
                 st.error("분석 결과를 찾을 수 없습니다. 다시 시도해주세요.")
                 st.session_state.current_step = 0
                 return
 
-            recommendations = st.session_state.recommendations
             user_profile = st.session_state.user_profile
             
             st.title("당신을 위한 맞춤 스타일 제안 📋")
@@ -351,7 +427,7 @@ class StreamlitApp:
                     self.cleanup()
                     st.session_state.current_step = 0
                     st.session_state.user_profile = None
-                    st.session_state.recommendations = None
+                    release_session_results(st.session_state, 'recommendations', RESULT_STORE)
                     st.rerun()
 
         except Exception as e:
@@ -359,6 +435,14 @@ class StreamlitApp:
             logging.error(f"Display results error: {str(e)}")
             st.session_state.current_step = 0
 
+    @staticmethod
+    def render_memory_report():
+        """MEMORY_PROFILING이 설정된 경우 사이드바에 메모리 사용량을 표시합니다."""
+        if not MEMORY_PROFILING:
+            return
+        with st.sidebar.expander("메모리 사용량"):
+            st.json(memory_report(st.session_state))
+
     def cleanup(self):
         """세션 종료 시 정리 작업을 수행합니다."""
         self.image_processor.clear_uploads()
@@ -372,6 +456,7 @@ class StreamlitApp:
                 asyncio.run(self.generate_and_display_recommendations())
             elif st.session_state.current_step == 2:
                 self.display_results()
+            self.render_memory_report()
         except Exception as e:
             st.error(f"오류가 발생했습니다: {str(e)}")
             logging.error(f"Application error: {str(e)}")
@@ -384,6 +469,8 @@ def main():
     """메인 함수"""
     try:
         logging.info("애플리케이션 시작")
+        load_cassette()
+        start_profiling()
         app = StreamlitApp()
         app.run()
     except Exception as e:
@@ -0,0 +1,177 @@
+# cassette.py
+
+import argparse
+import asyncio
+import atexit
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain.tools import Tool
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+CASSETTE_VERSION = 1
+
+
+class CassetteMissError(Exception):
+    """재생 모드에서 카세트에 기록되지 않은 요청이 들어왔을 때 발생합니다."""
+
+
+class Cassette:
+    """
+    LLM 요청/응답과 도구 호출을 기록하고 재생하는 카세트 파일입니다.
+    요청 내용의 해시를 키로 사용하며, 같은 요청이 여러 번 기록되면 기록된 순서대로 재생합니다.
+    :param path: 카세트 파일 경로 (JSON)
+    :param mode: "record" 또는 "replay"
+    :param replay_latency: 재생 시 기록된 응답 시간만큼 대기할지 여부
+    """
+
+    def __init__(self, path: str, mode: str, replay_latency: bool = False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"지원하지 않는 카세트 모드입니다: {mode}")
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self.metadata: Dict[str, Any] = {}
+        self.interactions: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if mode == "replay":
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+            self.metadata = data.get("metadata", {})
+            self.interactions = data.get("interactions", {})
+
+    @staticmethod
+    def key(kind: str, name: str, request: Any) -> str:
+        payload = json.dumps([kind, name, request], ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def record(self, key: str, request: Any, response: str, latency: float) -> None:
+        with self._lock:
+            self.interactions.setdefault(key, []).append(
+                {"request": request, "response": response, "latency": round(latency, 4)}
+            )
+
+    def replay(self, key: str, description: str) -> Tuple[str, float]:
+        """기록된 응답과 응답 시간을 반환합니다. 기록이 모두 소진되면 마지막 응답을 반복합니다."""
+        with self._lock:
+            entries = self.interactions.get(key)
+            if not entries:
+                raise CassetteMissError(f"카세트에 기록되지 않은 요청입니다: {description}")
+            index = self._cursors.get(key, 0)
+            self._cursors[key] = index + 1
+            entry = entries[min(index, len(entries) - 1)]
+        return entry["response"], entry["latency"] if self.replay_latency else 0.0
+
+    def save(self) -> None:
+        """기록 모드의 카세트를 원자적으로 저장합니다."""
+        if self.mode != "record":
+            return
+        with self._lock:
+            data = json.dumps(
+                {"version": CASSETTE_VERSION, "metadata": self.metadata, "interactions": self.interactions},
+                ensure_ascii=False, indent=2
+            )
+        # config가 이 모듈을 import하므로 순환 import를 피하려고 사용할 때 불러옴
+        from result_writer import _atomic_write
+        _atomic_write(self.path, data.encode("utf-8"))
+        logging.info(f"카세트가 {self.path}에 저장되었습니다. (요청 {sum(map(len, self.interactions.values()))}건)")
+
+    def wrap_llm(self, llm: Optional[BaseChatModel], model_name: str) -> "CassetteChatModel":
+        return CassetteChatModel(inner=llm, cassette=self, model_name=model_name)
+
+    def wrap_tool(self, tool: Tool) -> Tool:
+        """도구 호출을 기록하거나 재생하는 같은 이름의 도구를 반환합니다."""
+        def run(tool_input: str) -> str:
+            key = self.key("tool", tool.name, tool_input)
+            if self.mode == "replay":
+                output, latency = self.replay(key, f"{tool.name}({tool_input[:50]})")
+                time.sleep(latency)
+                return output
+            started = time.perf_counter()
+            output = str(tool.run(tool_input))
+            self.record(key, {"tool": tool.name, "input": tool_input}, output, time.perf_counter() - started)
+            return output
+
+        return Tool(name=tool.name, func=run, description=tool.description)
+
+
+class CassetteChatModel(BaseChatModel):
+    """카세트를 통해 LLM 호출을 기록(내부 모델 호출)하거나 재생(내부 모델 없이)하는 래퍼입니다."""
+
+    inner: Optional[BaseChatModel] = None
+    cassette: Any = None
+    model_name: str = ""
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    def _request(self, messages: List[BaseMessage], stop: Optional[List[str]]) -> Tuple[str, Dict[str, Any]]:
+        request = {"messages": [[message.type, message.content] for message in messages], "stop": stop}
+        return self.cassette.key("llm", self.model_name, request), request
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        key, request = self._request(messages, stop)
+        if self.cassette.mode == "replay":
+            content, latency = self.cassette.replay(key, f"{self.model_name} LLM 호출")
+            time.sleep(latency)
+        else:
+            started = time.perf_counter()
+            content = self.inner.invoke(messages, stop=stop).content
+            self.cassette.record(key, request, content, time.perf_counter() - started)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        key, request = self._request(messages, stop)
+        if self.cassette.mode == "replay":
+            content, latency = self.cassette.replay(key, f"{self.model_name} LLM 호출")
+            await asyncio.sleep(latency)
+        else:
+            started = time.perf_counter()
+            content = (await self.inner.ainvoke(messages, stop=stop)).content
+            self.cassette.record(key, request, content, time.perf_counter() - started)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+
+# 프로세스 전체에서 사용하는 카세트 (initialize_llm, create_tools가 참조)
+_active_cassette: Optional[Cassette] = None
+
+
+def activate(cassette: Optional[Cassette]) -> Optional[Cassette]:
+    """카세트를 활성화합니다. 기록 모드이면 프로세스 종료 시 자동으로 저장합니다."""
+    global _active_cassette
+    _active_cassette = cassette
+    if cassette is not None:
+        logging.info(f"카세트 {cassette.mode} 모드: {cassette.path}")
+        if cassette.mode == "record":
+            atexit.register(cassette.save)
+    return cassette
+
+
+def get_active_cassette() -> Optional[Cassette]:
+    return _active_cassette
+
+
+def add_cassette_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="PATH", help="LLM 및 도구 호출을 카세트 파일에 기록합니다.")
+    group.add_argument("--replay", metavar="PATH", help="카세트 파일에 기록된 응답으로 실행합니다 (네트워크 사용 안 함).")
+    parser.add_argument("--replay-latency", action="store_true", help="재생 시 기록된 응답 시간만큼 대기합니다.")
+
+
+def cassette_from_args(args: argparse.Namespace) -> Optional[Cassette]:
+    """--record/--replay 인자로 카세트를 생성하여 활성화합니다."""
+    if args.record:
+        return activate(Cassette(args.record, "record"))
+    if args.replay:
+        return activate(Cassette(args.replay, "replay", replay_latency=args.replay_latency))
+    return None
@@ -1,5 +1,86 @@
+import os
 from langchain_groq import ChatGroq
-from typing import Dict, Any
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+from typing import Dict, Any, AsyncIterator, Iterator
+import asyncio
+import time
+from dotenv import load_dotenv
+
+from cassette import get_active_cassette
+
+# 아래 설정은 import 시점에 읽으므로, 진입점보다 먼저 .env를 로드해야 함
+load_dotenv()
+
+# 로컬 상품 카탈로그 경로 (CSV 또는 Parquet, 미설정 시 카탈로그 도구 비활성화)
+PRODUCT_CATALOG_PATH = os.getenv("PRODUCT_CATALOG_PATH", "")
+
+# 검색 결과를 축적하는 로컬 검색 인덱스 경로 (기본값 비활성화) 및 근사 검색(faiss) 사용 여부
+RETRIEVAL_INDEX_DIR = os.getenv("RETRIEVAL_INDEX_DIR", "")
+RETRIEVAL_USE_ANN = os.getenv("RETRIEVAL_USE_ANN", "false").lower() == "true"
+
+# LLM 백엔드 ("groq" 또는 로컬 테스트용 "fake") 및 fake 백엔드의 응답 지연(초)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0"))
+
+# HTTP API 서비스의 동시 실행 워커 수와 대기열 크기
+API_WORKERS = int(os.getenv("API_WORKERS", "4"))
+API_QUEUE_SIZE = int(os.getenv("API_QUEUE_SIZE", "100"))
+
+# 결과 파일 저장 위치와 형식 (쉼표로 구분: txt, md, json, json.gz, zip)
+RESULT_OUTPUT_DIR = os.getenv("RESULT_OUTPUT_DIR", ".")
+RESULT_FORMATS = tuple(fmt.strip() for fmt in os.getenv("RESULT_FORMATS", "txt").split(",") if fmt.strip())
+
+# 단계별 결과 캐시 크기 (프로필 일부만 바꿔 다시 요청할 때 영향 없는 단계를 재사용)
+STAGE_CACHE_SIZE = int(os.getenv("STAGE_CACHE_SIZE", "256"))
+
+# 입력 폼을 작성하는 동안 필요한 필드가 정해진 단계(트렌드 분석 등)를 미리 실행할지 여부
+SPECULATIVE_PREFETCH = os.getenv("SPECULATIVE_PREFETCH", "true").lower() == "true"
+
+# 실행 중 완료된 단계 결과를 저장하는 디렉토리 (실패 후 재실행 시 완료된 단계는 건너뜀)
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", ".checkpoints")
+# 체크포인트 보관 기간(초). 다시 실행되지 않아 남은 체크포인트는 이 기간이 지나면 삭제됨
+CHECKPOINT_TTL = float(os.getenv("CHECKPOINT_TTL", "604800"))
+
+# 종합 보고서 작성 방식
+# "template": 분석 에이전트가 스키마에 맞는 JSON을 출력하고, 보고서는 LLM 호출 없이 로컬에서 렌더링 (기본값)
+# "llm": 분석 에이전트가 자유 형식으로 답하고, 보고서 에이전트(LLM)가 종합
+REPORT_MODE = os.getenv("REPORT_MODE", "template")
+
+# 메모리 사용량 측정 (tracemalloc으로 단계별 할당량 기록, 실행 속도가 느려지므로 기본값 비활성화)
+MEMORY_PROFILING = os.getenv("MEMORY_PROFILING", "false").lower() == "true"
+
+# Streamlit 세션당 메모리 상한(바이트)과, 이보다 큰 결과는 세션 상태 대신 결과 저장소에 보관하는 기준(바이트)
+# 상한은 추천 결과를 결과 저장소로 옮기는 방식으로만 지켜지며, 결과 외의 세션 값이 상한을 넘기면 경고만 기록함
+SESSION_MEMORY_CAP = int(os.getenv("SESSION_MEMORY_CAP", "1000000"))
+SESSION_OFFLOAD_THRESHOLD = int(os.getenv("SESSION_OFFLOAD_THRESHOLD", "64000"))
+
+# 세션 결과 저장소 위치와 보관 기간(초)
+SESSION_STORE_DIR = os.getenv("SESSION_STORE_DIR", ".session_store")
+SESSION_STORE_TTL = float(os.getenv("SESSION_STORE_TTL", "86400"))
+
+# 프로세스 전체에서 동시에 실행할 수 있는 추천 파이프라인 수 (Streamlit 세션 공통)
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "4"))
+# 실행을 기다릴 수 있는 요청 수
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "16"))
+# 대기열이 가득 찼을 때의 처리: reject(거절) 또는 downgrade(트렌드 분석 생략 모드로 대기)
+ADMISSION_SHED_POLICY = os.getenv("ADMISSION_SHED_POLICY", "reject").lower()
+
+# 에이전트 스크래치패드에 넣는 도구 결과 하나의 최대 글자 수
+SCRATCHPAD_OBSERVATION_CHARS = int(os.getenv("SCRATCHPAD_OBSERVATION_CHARS", "1500"))
+# 원래 형식으로 유지할 최근 단계 수 (그 이전 단계는 한 줄 요약으로 압축)
+SCRATCHPAD_RECENT_STEPS = int(os.getenv("SCRATCHPAD_RECENT_STEPS", "2"))
+# 압축된 단계 요약의 최대 글자 수
+SCRATCHPAD_SUMMARY_CHARS = int(os.getenv("SCRATCHPAD_SUMMARY_CHARS", "160"))
+
+# 분석 에이전트 실행 전에 필요한 검색을 한 번에 계획하고 병렬로 실행할지 여부,
+# 계획할 최대 검색 수와 검색 하나의 제한 시간(초)
+TOOL_PLANNING = os.getenv("TOOL_PLANNING", "true").lower() == "true"
+PLANNER_MAX_QUERIES = int(os.getenv("PLANNER_MAX_QUERIES", "5"))
+PLANNER_TOOL_TIMEOUT = float(os.getenv("PLANNER_TOOL_TIMEOUT", "20"))
+# 계획된 검색을 실행하는 전용 스레드 수 (시간이 초과된 호출이 점유해도 다른 작업에 영향이 없도록 별도로 제한)
+PLANNER_TOOL_WORKERS = int(os.getenv("PLANNER_TOOL_WORKERS", "8"))
 
 # 각 에이전트별 모델 설정
 AGENT_MODELS = {
@@ -9,6 +90,15 @@ AGENT_MODELS = {
     "report_agent": "llama-3.2-90b-text-preview"
 }
 
+# 각 에이전트가 사용할 수 있는 도구 (생성된 도구 중 목록에 있는 것만 제공)
+_SEARCH_TOOLS = ["Local Knowledge Search", "DuckDuckGo Search", "YouTube Search"]
+AGENT_TOOLS = {
+    "user_analyst": _SEARCH_TOOLS + ["Arxiv"],
+    "trend_analyst": _SEARCH_TOOLS + ["Arxiv"],
+    "stylist": _SEARCH_TOOLS + ["Product Catalog", "Outfit Optimizer"],
+    "report_agent": _SEARCH_TOOLS + ["Product Catalog"],
+}
+
 async def initialize_llm(api_key: str, agent_name: str) -> Any:
     """
     Groq LLM을 비동기적으로 초기화합니다.
@@ -17,13 +107,60 @@ async def initialize_llm(api_key: str, agent_name: str) -> Any:
     :return: 초기화된 LLM 객체
     """
     model_name = AGENT_MODELS.get(agent_name, "llama-3.2-90b-text-preview")  # 기본값 설정
-    return ChatGroq(
-        groq_api_key=api_key,
-        model_name=model_name,
-        temperature=0,  # 생성 텍스트의 창의성 조절
-        max_tokens=None,  # 생성할 최대 토큰 수
-        model_kwargs={"top_p": 0.9}  # top_p를 model_kwargs로 이동
+
+    # 카세트 재생 모드에서는 실제 LLM 없이 기록된 응답을 사용
+    cassette = get_active_cassette()
+    if cassette is not None and cassette.mode == "replay":
+        return cassette.wrap_llm(None, model_name)
+
+    if LLM_BACKEND == "fake":
+        llm = initialize_fake_llm(agent_name)
+    else:
+        llm = ChatGroq(
+            groq_api_key=api_key,
+            model_name=model_name,
+            temperature=0,  # 생성 텍스트의 창의성 조절
+            max_tokens=None,  # 생성할 최대 토큰 수
+            model_kwargs={"top_p": 0.9}  # top_p를 model_kwargs로 이동
+        )
+    return cassette.wrap_llm(llm, model_name) if cassette is not None else llm
+
+class FakeChatModel(FakeListChatModel):
+    """응답 전체를 한 번의 지연 후 한 덩어리로 스트리밍하는 테스트용 LLM입니다."""
+
+    latency: float = 0.0
+
+    def _next_response(self) -> str:
+        response = self.responses[self.i]
+        self.i = (self.i + 1) % len(self.responses)
+        return response
+
+    def _call(self, *args: Any, **kwargs: Any) -> str:
+        time.sleep(self.latency)
+        return self._next_response()
+
+    def _stream(self, *args: Any, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        yield ChatGenerationChunk(message=AIMessageChunk(content=self._next_response()))
+
+    async def _astream(self, *args: Any, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        yield ChatGenerationChunk(message=AIMessageChunk(content=self._next_response()))
+
+def initialize_fake_llm(agent_name: str) -> Any:
+    """
+    API 호출 없이 고정 응답을 돌려주는 테스트용 LLM을 생성합니다.
+    응답은 결과 검증(REPORT_MODE=template이면 단계 스키마, 아니면 100자 이상)을 통과하도록 작성됩니다.
+    """
+    stage = {"user_analyst": "user_analysis", "trend_analyst": "trend_analysis", "stylist": "style_recommendations"}.get(agent_name)
+    if REPORT_MODE == "template" and stage is not None:
+        from structured_output import sample_output
+        return FakeChatModel(responses=[f"최종 응답: {sample_output(stage, agent_name)}"], latency=FAKE_LLM_LATENCY)
+    response = (
+        f"최종 응답: [{agent_name}] 테스트용 응답입니다. "
+        + "이 응답은 LLM_BACKEND=fake 설정에서 실제 Groq API를 호출하지 않고 생성되었습니다. " * 3
     )
+    return FakeChatModel(responses=[response], latency=FAKE_LLM_LATENCY)
 
 def get_model_name(agent_name: str) -> str:
     """
@@ -1,14 +1,18 @@
 # custom_agent.py
 
 from typing import List, Any, Union
-from langchain.agents import AgentExecutor, create_react_agent
+from langchain.agents import AgentExecutor
 from langchain.schema import AgentAction, AgentFinish
 from langchain.agents.agent import AgentOutputParser
 from langchain.prompts import PromptTemplate
+from langchain.tools.render import render_text_description
+from langchain_core.runnables import RunnablePassthrough
 from pydantic import BaseModel, Field
 from functools import lru_cache
 import re
 
+from scratchpad import format_compacted_scratchpad
+
 class ImprovedOutputParser(AgentOutputParser):
     def parse(self, text: str) -> Union[AgentAction, AgentFinish]:
         if "최종 응답:" in text:
@@ -36,6 +40,7 @@ class CustomAgent(BaseModel):
     tools: List[Any] = Field(...)
     agent_executor: Any = Field(None)
     memory: List[str] = Field(default_factory=list)
+    tool_context: str = Field("")  # 실행 전에 미리 수집한 검색 결과 (tool_planner)
 
     class Config:
         arbitrary_types_allowed = True
@@ -56,6 +61,7 @@ class CustomAgent(BaseModel):
         검색 도구를 활용하여 실제 제품 정보를 찾아주세요.
 
         Human: {input}
+        {context}
         {agent_scratchpad}
 
         Tools available:
@@ -76,7 +82,7 @@ class CustomAgent(BaseModel):
 
         prompt = PromptTemplate(
             template=react_template,
-            input_variables=["input", "agent_scratchpad"],
+            input_variables=["input", "context", "agent_scratchpad"],
             partial_variables={
                 "role": self.role,
                 "goal": self.goal,
@@ -88,7 +94,19 @@ class CustomAgent(BaseModel):
         )
 
         output_parser = ImprovedOutputParser()
-        agent = create_react_agent(self.llm, self.tools, prompt, output_parser=output_parser)
+        # create_react_agent와 같은 구성이지만, 도구 결과를 누적 그대로 넣지 않고 압축한 스크래치패드를 사용
+        prompt = prompt.partial(
+            tools=render_text_description(list(self.tools)),
+            tool_names=", ".join(tool.name for tool in self.tools)
+        )
+        agent = (
+            RunnablePassthrough.assign(
+                agent_scratchpad=lambda x: format_compacted_scratchpad(x["intermediate_steps"])
+            )
+            | prompt
+            | self.llm.bind(stop=["\nObservation"])
+            | output_parser
+        )
         self.agent_executor = AgentExecutor.from_agent_and_tools(
             agent=agent,
             tools=self.tools,
@@ -107,7 +125,10 @@ class CustomAgent(BaseModel):
         input_text = kwargs.get("input", "")
         self.add_to_memory(input_text)
         processed_input = self.efficient_text_processing(input_text)
-        response = await self.agent_executor.ainvoke({"input": processed_input})
+        context = kwargs.get("context", self.tool_context)
+        if context:
+            context = f"미리 수집한 검색 결과 (필요한 정보가 충분하면 도구를 다시 사용하지 말고 바로 답하세요):\n{context}"
+        response = await self.agent_executor.ainvoke({"input": processed_input, "context": context})
         output = response.get('output', str(response))
         return AgentFinish(return_values={"output": output}, log=str(response))
 
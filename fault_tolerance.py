@@ -0,0 +1,146 @@
+# fault_tolerance.py
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import aiohttp
+import groq
+
+from config import CHECKPOINT_DIR, CHECKPOINT_TTL, REPORT_MODE
+from result_writer import _atomic_write
+from structured_output import STAGE_SCHEMAS, StructuredOutputError, parse_stage_output
+
+
+# 에러 처리를 위한 예외 클래스
+class FashionRecommendationError(Exception):
+    pass
+
+class RateLimitError(Exception):
+    pass
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """잠시 후 다시 시도하면 성공할 수 있는 오류(속도 제한, 일시적 서버/네트워크 오류)인지 판단합니다."""
+    # Groq SDK 오류 (APITimeoutError는 APIConnectionError의 하위 클래스)
+    if isinstance(error, groq.APIConnectionError):
+        return True
+    if isinstance(error, groq.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError, aiohttp.ClientConnectionError)):
+        return True
+    return "rate limit" in str(error).lower()
+
+
+async def retry_with_exponential_backoff(
+    coroutine: Callable,
+    max_retries: int = 5,
+    base_delay: float = 1,
+    max_delay: float = 60
+) -> Any:
+    """
+    일시적인 오류가 발생하면 지수적으로 대기 시간을 늘리며 다시 시도합니다.
+    :param coroutine: 매 시도마다 새 코루틴을 만드는 함수 (실패한 단계만 다시 실행되도록 단계 단위로 감쌉니다)
+    """
+    retries = 0
+    delay = base_delay
+    last_error: Optional[BaseException] = None
+
+    while retries < max_retries:
+        try:
+            return await coroutine()
+        except Exception as e:
+            if not is_transient_error(e):
+                raise
+            last_error = e
+            retries += 1
+            delay = min(delay * 2, max_delay)
+            logging.warning(f"Transient error ({str(e) or type(e).__name__}). Retrying in {delay:.2f} seconds... (Attempt {retries}/{max_retries})")
+            await asyncio.sleep(delay)
+
+    detail = f": {str(last_error) or type(last_error).__name__}" if last_error is not None else ""
+    raise RateLimitError(f"Max retries reached after transient errors{detail}") from last_error
+
+
+# 결과 검증 함수
+def validate_results(results: List[str], stages: Optional[List[str]] = None) -> None:
+    """
+    분석 결과를 검증합니다.
+    REPORT_MODE=template이고 단계 이름이 주어지면 각 결과를 단계 스키마로 검증하고,
+    그렇지 않으면 자유 형식 결과의 길이만 확인합니다.
+    :param stages: results와 같은 순서의 단계 이름
+    """
+    for index, result in enumerate(results):
+        if REPORT_MODE == "template" and stages and stages[index] in STAGE_SCHEMAS:
+            try:
+                parse_stage_output(stages[index], result)
+            except StructuredOutputError as e:
+                raise FashionRecommendationError(f"분석 결과가 형식에 맞지 않습니다 ({stages[index]}): {str(e)}") from None
+        elif not result or len(result.strip()) < 100:
+            raise FashionRecommendationError("분석 결과가 불충분합니다.")
+
+
+class StageCheckpoint:
+    """
+    한 번의 실행에서 완료된 단계 결과를 디스크에 저장합니다.
+    실행이 중간에 실패해도 같은 입력으로 다시 실행하면 완료된 단계는 다시 실행하지 않습니다.
+    각 결과는 단계 캐시 키와 함께 저장되어, 입력이나 모델이 바뀐 단계의 결과는 사용되지 않습니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()  # 여러 단계가 동시에 저장할 때 이전 스냅샷이 최신 파일을 덮어쓰지 않도록 함
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as file:
+                    self._entries = json.load(file)
+                logging.info(f"체크포인트에서 완료된 단계를 불러왔습니다: {', '.join(self._entries)}")
+            except (OSError, ValueError) as e:
+                logging.warning(f"체크포인트를 읽을 수 없어 무시합니다 ({path}): {str(e)}")
+
+    @classmethod
+    def for_run(cls, user_info: Any, current_date: str, directory: str = CHECKPOINT_DIR) -> "StageCheckpoint":
+        """사용자 입력과 날짜로 실행을 식별하는 체크포인트를 엽니다. 열 때 만료된 체크포인트를 함께 정리합니다."""
+        cls.sweep(directory)
+        payload = json.dumps([vars(user_info), current_date], ensure_ascii=False, sort_keys=True, default=str)
+        run_id = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+        return cls(os.path.join(directory, f"{run_id}.json"))
+
+    def get(self, stage: str, key: str) -> Optional[str]:
+        entry = self._entries.get(stage)
+        if entry is None or entry["key"] != key:
+            return None
+        return entry["output"]
+
+    def put(self, stage: str, key: str, output: str) -> None:
+        with self._lock:
+            self._entries[stage] = {"key": key, "output": output}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            _atomic_write(self.path, json.dumps(self._entries, ensure_ascii=False).encode("utf-8"))
+
+    @staticmethod
+    def sweep(directory: str = CHECKPOINT_DIR, ttl: float = CHECKPOINT_TTL) -> None:
+        """다시 실행되지 않아 남은 만료 체크포인트를 삭제합니다."""
+        if not os.path.isdir(directory):
+            return
+        cutoff = time.time() - ttl
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def clear(self) -> None:
+        """실행이 완료되면 체크포인트를 삭제합니다."""
+        self._entries = {}
+        if os.path.exists(self.path):
+            os.unlink(self.path)
@@ -0,0 +1,149 @@
+# memory_monitor.py
+
+import logging
+import os
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import fields, is_dataclass
+from typing import Any, Dict, Iterator, MutableMapping, Optional
+
+from config import MEMORY_PROFILING, SESSION_MEMORY_CAP, SESSION_OFFLOAD_THRESHOLD
+from result_writer import ResultStore
+
+try:
+    import resource  # Unix 전용
+except ImportError:
+    resource = None
+
+# 세션 상태에 결과 대신 저장되는 핸들의 키
+HANDLE_KEY = "result_handle"
+
+_stage_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def start_profiling(frames: int = 1) -> None:
+    """MEMORY_PROFILING이 설정되어 있으면 tracemalloc을 시작합니다 (여러 번 호출해도 한 번만 시작)."""
+    if MEMORY_PROFILING and not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        logging.info("메모리 프로파일링(tracemalloc)을 시작했습니다.")
+
+
+@contextmanager
+def track_stage_memory(stage: str) -> Iterator[None]:
+    """
+    블록 실행 전후의 tracemalloc 스냅샷을 비교하여 단계별 할당량을 기록합니다.
+    여러 단계가 동시에 실행되면 같은 시간대의 다른 단계 할당이 함께 집계됩니다.
+    tracemalloc이 꺼져 있으면 아무것도 하지 않습니다.
+    """
+    if not tracemalloc.is_tracing():
+        yield
+        return
+    before = tracemalloc.take_snapshot()
+    current_before = tracemalloc.get_traced_memory()[0]
+    try:
+        yield
+    finally:
+        current_after, peak = tracemalloc.get_traced_memory()
+        delta = current_after - current_before
+        top = tracemalloc.take_snapshot().compare_to(before, "filename")[:3]
+        with _stats_lock:
+            stats = _stage_stats.setdefault(stage, {"runs": 0, "last_delta": 0, "max_delta": 0, "peak": 0})
+            stats["runs"] += 1
+            stats["last_delta"] = delta
+            stats["max_delta"] = max(stats["max_delta"], delta)
+            stats["peak"] = max(stats["peak"], peak)
+        details = ", ".join(f"{os.path.basename(diff.traceback[0].filename)} {diff.size_diff / 1024:+.0f}KiB" for diff in top)
+        logging.info(f"[메모리] '{stage}' 단계 {delta / 1024:+.1f}KiB (최대 {peak / 1024 / 1024:.1f}MiB) - {details}")
+
+
+def deep_sizeof(obj: Any, _seen: Optional[set] = None, _depth: int = 0) -> int:
+    """컨테이너, 데이터클래스, 일반 객체 속성을 따라가며 대략적인 메모리 크기(바이트)를 계산합니다."""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen or _depth > 20:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(deep_sizeof(k, seen, _depth + 1) + deep_sizeof(v, seen, _depth + 1) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_sizeof(item, seen, _depth + 1) for item in obj)
+    if is_dataclass(obj):
+        return size + sum(deep_sizeof(getattr(obj, f.name), seen, _depth + 1) for f in fields(obj))
+    if hasattr(obj, "__dict__"):
+        return size + deep_sizeof(vars(obj), seen, _depth + 1)
+    return size
+
+
+def session_footprint(state: MutableMapping[str, Any]) -> Dict[str, int]:
+    """세션 상태의 키별 대략적인 메모리 크기(바이트)입니다."""
+    return {str(key): deep_sizeof(value) for key, value in state.items()}
+
+
+def memory_report(state: Optional[MutableMapping[str, Any]] = None) -> Dict[str, Any]:
+    """프로세스, 단계별, 세션별 메모리 사용량을 모아 반환합니다."""
+    report: Dict[str, Any] = {}
+    if resource is not None:
+        # Linux에서 ru_maxrss 단위는 KiB
+        report["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        report["traced_current_mb"] = round(current / 1024 / 1024, 1)
+        report["traced_peak_mb"] = round(peak / 1024 / 1024, 1)
+        with _stats_lock:
+            report["stages"] = {stage: dict(stats) for stage, stats in _stage_stats.items()}
+    if state is not None:
+        footprint = session_footprint(state)
+        report["session_bytes"] = sum(footprint.values())
+        report["session_keys"] = dict(sorted(footprint.items(), key=lambda item: -item[1])[:5])
+    return report
+
+
+def is_offloaded(value: Any) -> bool:
+    return isinstance(value, dict) and HANDLE_KEY in value
+
+
+def store_session_results(state: MutableMapping[str, Any], key: str, results: Dict[str, str], store: ResultStore) -> int:
+    """
+    결과를 세션 상태에 저장합니다.
+    결과가 SESSION_OFFLOAD_THRESHOLD보다 크거나 저장 후 세션이 SESSION_MEMORY_CAP을 넘으면
+    결과 저장소에 두고 세션 상태에는 핸들만 남깁니다.
+    세션 상한은 결과를 옮기는 방식으로만 지켜집니다. 결과 외의 값은 옮길 수 없으므로,
+    결과를 옮긴 뒤에도 상한을 넘으면 경고만 기록합니다 (권고 상한).
+    :return: 저장 후 세션 상태의 대략적인 크기(바이트)
+    """
+    release_session_results(state, key, store)
+    size = deep_sizeof(results)
+    footprint = sum(session_footprint(state).values())
+    if size > SESSION_OFFLOAD_THRESHOLD or footprint + size > SESSION_MEMORY_CAP:
+        state[key] = {HANDLE_KEY: store.put(results), "size": size}
+        logging.info(f"결과({size / 1024:.1f}KiB)를 결과 저장소로 옮기고 세션에는 핸들만 보관합니다.")
+    else:
+        state[key] = results
+
+    footprint = sum(session_footprint(state).values())
+    if footprint > SESSION_MEMORY_CAP:
+        logging.warning(f"세션 메모리({footprint / 1024:.1f}KiB)가 상한({SESSION_MEMORY_CAP / 1024:.1f}KiB)을 넘었습니다.")
+    else:
+        logging.info(f"세션 메모리: {footprint / 1024:.1f}KiB")
+    return footprint
+
+
+def load_session_results(state: MutableMapping[str, Any], key: str, store: ResultStore) -> Optional[Dict[str, str]]:
+    """세션 상태의 결과를 반환합니다. 핸들이면 결과 저장소에서 읽습니다 (만료되었으면 None)."""
+    value = state.get(key)
+    if is_offloaded(value):
+        return store.get(value[HANDLE_KEY])
+    return value
+
+
+def release_session_results(state: MutableMapping[str, Any], key: str, store: ResultStore) -> None:
+    """세션의 결과와 결과 저장소의 파일을 삭제합니다."""
+    value = state.get(key)
+    if is_offloaded(value):
+        store.delete(value[HANDLE_KEY])
+    state[key] = None
@@ -0,0 +1,257 @@
+# outfit_optimizer.py
+
+import heapq
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from langchain.tools import Tool
+
+from product_catalog import ProductCatalog, parse_tool_input, _parse_price
+
+# 코디 구성 카테고리 (순서대로 최적화) 및 카탈로그 카테고리 표기
+OUTFIT_CATEGORIES = ["top", "bottom", "outer", "shoes", "accessories"]
+CATEGORY_LABELS = {
+    "top": "상의",
+    "bottom": "하의",
+    "outer": "아우터",
+    "shoes": "신발",
+    "accessories": "액세서리",
+}
+# 생략 가능한 카테고리 (나머지는 반드시 하나씩 포함)
+OPTIONAL_CATEGORIES = {"outer", "accessories"}
+DEFAULT_PRICE_UNIT = 1000  # 예산 이산화 단위 (원)
+MAX_BUDGET_CELLS = 500     # DP 테이블의 최대 예산 칸 수
+CANDIDATE_CHUNK = 2048     # 한 번에 병합하는 후보 열 수 (메모리 상한)
+MAX_TOP_K = 10             # 도구 입력으로 요청할 수 있는 최대 코디 수
+MAX_RELAXED_TOP_K = 128    # 실제 가격으로 걸러낼 완화 해 후보의 최대 개수
+
+# 카탈로그 기반 호환성 점수 가중치
+BASE_ITEM_SCORE = 1.0
+TPO_MATCH_SCORE = 1.0
+COLOR_MATCH_SCORE = 0.5
+
+
+@dataclass
+class Outfit:
+    score: float
+    total_price: int
+    items: Dict[str, int] = field(default_factory=dict)  # 카테고리 -> 후보 인덱스
+
+
+def optimize_outfits(
+    candidates: Dict[str, Tuple[np.ndarray, np.ndarray]],
+    budget: int,
+    top_k: int = 3,
+    optional_categories: Optional[set] = None,
+    price_unit: int = DEFAULT_PRICE_UNIT,
+) -> List[Outfit]:
+    """
+    카테고리별 후보 중 하나씩(선택 카테고리는 생략 가능) 골라 예산 내 점수 합이 최대인 코디를 찾습니다.
+    다중 선택 배낭 문제를 예산 칸마다 상위 K개 부분해를 유지하는 동적 계획법으로 풉니다.
+    가격은 단위 금액으로 내림하여 이산화하므로(완화 문제) 실제로 예산 안에 드는 코디는 모두 DP 해 공간에 포함되며,
+    완화 해 상위 후보를 실제 총액으로 걸러 예산을 넘는 코디를 제외합니다.
+    걸러낸 뒤 top_k개가 남지 않으면 완화 해 후보 수를 두 배로 늘려 다시 풉니다 (최대 MAX_RELAXED_TOP_K).
+    :param candidates: 카테고리 -> (가격 배열, 호환성 점수 배열)
+    :param budget: 총 예산 (원)
+    :param top_k: 반환할 코디 수
+    :param optional_categories: 생략 가능한 카테고리 (기본값 OPTIONAL_CATEGORIES)
+    :param price_unit: 예산 이산화 최소 단위 (원)
+    :return: 점수 내림차순으로 정렬된 Outfit 리스트
+    """
+    if optional_categories is None:
+        optional_categories = OPTIONAL_CATEGORIES
+    if budget <= 0 or top_k <= 0:
+        return []
+
+    unit = max(price_unit, math.ceil(budget / MAX_BUDGET_CELLS))
+    relaxed_k = top_k
+    while True:
+        relaxed = _relaxed_top_k(candidates, budget, unit, relaxed_k, optional_categories)
+        outfits = [outfit for outfit in relaxed if outfit.total_price <= budget]
+        # 완화 해 상위 relaxed_k개 밖의 코디는 점수가 더 높을 수 없으므로, top_k개가 남았거나
+        # 완화 해를 모두 확인했다면(relaxed_k개 미만) 정확한 상위 코디임
+        if len(outfits) >= top_k or len(relaxed) < relaxed_k:
+            return outfits[:top_k]
+        if relaxed_k >= MAX_RELAXED_TOP_K:
+            logging.warning(f"예산 경계의 후보가 많아 상위 {relaxed_k}개 완화 해 중 예산 내 코디 {len(outfits)}개만 반환합니다.")
+            return outfits[:top_k]
+        relaxed_k = min(relaxed_k * 2, MAX_RELAXED_TOP_K)
+
+
+def _relaxed_top_k(
+    candidates: Dict[str, Tuple[np.ndarray, np.ndarray]],
+    budget: int,
+    unit: int,
+    k: int,
+    optional_categories: set,
+) -> List[Outfit]:
+    """내림한 이산 비용 기준으로 예산 칸 안에 드는 상위 K개 코디를 반환합니다 (실제 총액은 예산을 넘을 수 있음)."""
+    cells = budget // unit + 1
+
+    dp = np.full((cells, k), -np.inf)
+    dp[0, 0] = 0.0
+    pointers = []  # 카테고리별 (후보 비용, 후보 인덱스, 역추적 코드 = 이전 순위 * 후보 수 + 후보 위치)
+
+    cell_index = np.arange(cells)[:, None]
+    categories = list(candidates)
+    for category in categories:
+        prices, scores = (np.asarray(a) for a in candidates[category])
+        costs, item_ids = _prune_candidates(prices, scores, unit, budget, k)
+        if category in optional_categories:
+            costs = np.r_[0, costs]
+            item_ids = np.r_[-1, item_ids]
+        size = len(item_ids)
+        if size == 0:
+            return []  # 필수 카테고리에 예산 내 후보가 없음
+        item_scores = np.zeros(size)
+        item_scores[item_ids >= 0] = scores[item_ids[item_ids >= 0]]
+
+        new_dp = np.full((cells, k), -np.inf)
+        codes = np.full((cells, k), -1, dtype=np.int64)
+
+        # 1단계: 모든 후보를 각 칸의 최상위 부분해(순위 0)와 결합
+        # dp 열 앞에 -inf를 덧댄 슬라이딩 윈도우에서 비용 c만큼 이동한 열은 연속된 행 하나가 됨
+        windows = sliding_window_view(np.r_[np.full(cells, -np.inf), dp[:, 0]], cells)
+        for start in range(0, size, CANDIDATE_CHUNK):
+            local = np.arange(start, min(start + CANDIDATE_CHUNK, size))
+            values = windows[cells - costs[local]] + item_scores[local][:, None]
+            new_dp, codes = _merge_top_k(new_dp, codes, values.T, np.broadcast_to(local, (cells, len(local))))
+
+        # 2단계: 순위 r-1 조합이 상위 K에 남은 후보만 순위 r 부분해와 결합
+        # (그렇지 않은 후보는 순위 r과 결합해도 이미 더 나은 K개가 있음)
+        for rank in range(1, k):
+            if not np.isfinite(dp[:, rank]).any():
+                break
+            prev_rank, local = np.divmod(codes, size)
+            prev = cell_index - costs[local]
+            valid = (codes >= 0) & (prev_rank == rank - 1) & (prev >= 0)
+            values = np.where(valid, dp[np.maximum(prev, 0), rank] + item_scores[local], -np.inf)
+            new_dp, codes = _merge_top_k(new_dp, codes, values, rank * size + local)
+
+        # 다음 카테고리에서 순위 0이 각 칸의 최고점이 되도록 내림차순 정렬
+        order = np.argsort(-new_dp, axis=1, kind="stable")
+        new_dp, codes = np.take_along_axis(new_dp, order, axis=1), np.take_along_axis(codes, order, axis=1)
+        dp = new_dp
+        pointers.append((costs, item_ids, codes, size))
+
+    flat = dp.ravel()
+    order = np.argsort(-flat, kind="stable")[:k]
+    outfits = []
+    for position in order:
+        if not np.isfinite(flat[position]):
+            break
+        cell, rank = divmod(int(position), k)
+        items = {}
+        for category, (costs, item_ids, codes, size) in zip(reversed(categories), reversed(pointers)):
+            rank, local = divmod(int(codes[cell, rank]), size)
+            if item_ids[local] >= 0:
+                items[category] = int(item_ids[local])
+            cell -= int(costs[local])
+        total_price = sum(int(np.asarray(candidates[c][0])[i]) for c, i in items.items())
+        outfits.append(Outfit(score=float(flat[position]), total_price=total_price, items=items))
+    return outfits
+
+
+def _merge_top_k(scores: np.ndarray, codes: np.ndarray, new_scores: np.ndarray, new_codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """칸별 상위 K개 점수와 새 후보 점수를 합쳐 다시 상위 K개만 남깁니다."""
+    k = scores.shape[1]
+    merged = np.concatenate([scores, new_scores], axis=1)
+    # -inf가 많은 행에서도 선택이 느려지지 않도록 부호를 뒤집어 앞쪽 K개를 고름
+    top = np.argpartition(-merged, k - 1, axis=1)[:, :k]
+    merged_codes = np.concatenate([codes, np.broadcast_to(new_codes, new_scores.shape)], axis=1)
+    return np.take_along_axis(merged, top, axis=1), np.take_along_axis(merged_codes, top, axis=1)
+
+
+def _prune_candidates(prices: np.ndarray, scores: np.ndarray, unit: int, budget: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    비용이 같거나 낮으면서 점수가 같거나 높은 후보가 K개 이상 있는 후보는
+    어떤 상위 K 코디에도 필요하지 않으므로 제거합니다.
+    :return: 비용 오름차순·점수 내림차순·가격 오름차순으로 정렬된 (이산 비용, 후보 인덱스)
+    """
+    prices = np.asarray(prices, dtype=np.int64)
+    costs = prices // unit
+    valid = np.flatnonzero((prices >= 0) & (prices <= budget) & np.isfinite(scores))
+    if len(valid) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # 같은 이산 비용·점수라면 실제 가격이 낮은 후보를 남겨야 예산을 넘는 완화 해가 줄어듦
+    order = valid[np.lexsort((prices[valid], -scores[valid], costs[valid]))]
+
+    # 정렬 순서상 앞선 후보 중 점수 상위 K개를 유지하며 지배되는 후보를 건너뜀
+    keep = np.zeros(len(order), dtype=bool)
+    best: List[float] = []
+    for position, score in enumerate(scores[order].tolist()):
+        if len(best) < k:
+            heapq.heappush(best, score)
+            keep[position] = True
+        elif score > best[0]:
+            heapq.heapreplace(best, score)
+            keep[position] = True
+    return costs[order[keep]], order[keep]
+
+
+def catalog_candidates(
+    catalog: ProductCatalog,
+    budget: int,
+    gender: Optional[str] = None,
+    tpo: Optional[str] = None,
+    color: Optional[str] = None,
+) -> Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    카탈로그에서 카테고리별 후보와 호환성 점수(TPO·색상 일치도)를 계산합니다.
+    :return: 카테고리 -> (카탈로그 행 인덱스, 가격 배열, 점수 배열)
+    """
+    candidates = {}
+    for category in OUTFIT_CATEGORIES:
+        indices = catalog.filter_indices(category=CATEGORY_LABELS[category], gender=gender, max_price=budget)
+        scores = np.full(len(indices), BASE_ITEM_SCORE)
+        if tpo:
+            scores += TPO_MATCH_SCORE * catalog.tag_match_counts(indices, tpo)
+        if color:
+            color_rows = catalog.filter_indices(color=color)
+            scores += COLOR_MATCH_SCORE * np.isin(indices, color_rows)
+        candidates[category] = (indices, catalog.price[indices], scores)
+    return candidates
+
+
+def create_outfit_optimizer_tool(catalog: ProductCatalog) -> Tool:
+    def optimize(tool_input: str) -> str:
+        params = parse_tool_input(tool_input)
+        budget = _parse_price(params.get("budget"))
+        if budget is None or budget <= 0:
+            return "코디 최적화에는 budget(예산, 원)이 필요합니다."
+        try:
+            top_k = int(params.get("top_k", 3))
+        except ValueError:
+            return "top_k는 정수여야 합니다."
+        top_k = max(1, min(top_k, MAX_TOP_K))
+
+        candidates = catalog_candidates(catalog, budget, params.get("gender"), params.get("tpo"), params.get("color"))
+        required = [c for c in OUTFIT_CATEGORIES if c not in OPTIONAL_CATEGORIES and len(candidates[c][0]) == 0]
+        if required:
+            return f"예산 내 후보가 없는 필수 카테고리가 있습니다: {', '.join(CATEGORY_LABELS[c] for c in required)}"
+
+        outfits = optimize_outfits({c: (prices, scores) for c, (_, prices, scores) in candidates.items()}, budget, top_k=top_k)
+        if not outfits:
+            return "예산 내에서 구성 가능한 코디가 없습니다."
+
+        lines = []
+        for rank, outfit in enumerate(outfits, 1):
+            lines.append(f"추천 코디 {rank} (총 {outfit.total_price:,}원 / 예산 {budget:,}원, 점수 {outfit.score:.1f})")
+            for category in OUTFIT_CATEGORIES:
+                if category in outfit.items:
+                    p = catalog.row(candidates[category][0][outfit.items[category]])
+                    lines.append(f"  - [{CATEGORY_LABELS[category]}] {p['brand']} {p['name']} / {p['color']} / {p['price']:,}원 / {p['url']}")
+        return "\n".join(lines)
+
+    return Tool(
+        name="Outfit Optimizer",
+        func=optimize,
+        description=(
+            "카탈로그 상품으로 예산 내에서 TPO에 가장 잘 맞는 상의·하의·아우터·신발·액세서리 조합을 계산합니다. "
+            "입력 형식: budget=300000, gender=남성, tpo=결혼식, color=네이비, top_k=3"
+        )
+    )
@@ -0,0 +1,260 @@
+# pipeline.py
+
+import asyncio
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, Collection, Dict, List, Optional, Sequence
+
+from agent_config import AGENT_SPECS, create_agent, create_tools
+from config import REPORT_MODE, TOOL_PLANNING, get_model_name
+from custom_agent import CustomAgent
+from fault_tolerance import StageCheckpoint, retry_with_exponential_backoff
+from memory_monitor import track_stage_memory
+from result_writer import SECTION_TITLES
+from stage_cache import FieldView, StageCache, stage_key, stage_view
+from structured_output import STAGE_SCHEMAS, parse_stage_output, parse_with_repair, render_report, render_section
+from tool_planner import gather_tool_context
+from user_input import UserInput
+
+# 파이프라인 단계 (결과 딕셔너리 키와 동일)
+ANALYSIS_STAGES = ["user_analysis", "trend_analysis", "style_recommendations"]
+REPORT_STAGE = "final_report"
+# 실패해도 보고서를 작성할 수 있는 단계
+OPTIONAL_STAGES = {"trend_analysis"}
+DEGRADED_NOTICE = "{title} 단계를 완료하지 못해 이 내용 없이 보고서를 작성했습니다."
+
+
+class StageSkipped(Exception):
+    """축소 모드에서 재사용할 결과가 없어 단계를 실행하지 않았을 때 발생합니다."""
+
+
+def build_stage_task(stage: str, view: FieldView) -> str:
+    """
+    분석 단계의 에이전트 입력을 생성합니다.
+    입력은 해당 단계가 선언한 필드(STAGE_FIELDS)만으로 구성됩니다.
+    :param stage: 분석 단계 이름
+    :param view: 단계가 읽는 필드 값 (stage_view 결과)
+    """
+    if stage == "user_analysis":
+        bmi = view.weight / ((view.height / 100) ** 2)
+        return (f"현재 날짜는 {view.current_date}입니다. "
+                f"다음 사용자의 정보를 분석하여 체형, 스타일, 퍼스널 컬러를 파악합니다. "
+                f"사용자 정보: 성별: {view.gender}, "
+                f"키: {view.height}cm, 체중: {view.weight}kg, "
+                f"BMI: {bmi:.1f}, "
+                f"TPO: {view.tpo}, "
+                f"상황: {view.situation}")
+    if stage == "trend_analysis":
+        return (f"현재 날짜 {view.current_date} 기준으로 "
+                f"최신 글로벌 및 한국 패션 트렌드를 조사하고 요약합니다. "
+                f"사용자의 성별은 {view.gender}입니다.")
+    if stage == "style_recommendations":
+        return (f"사용자 정보와 현재 트렌드를 고려하여 개인화된 스타일과 아이템을 추천합니다. "
+                f"예산 {view.budget}원 내에서 구체적인 아이템과 "
+                f"실제 구매 가능한 링크를 제공해야 합니다. "
+                f"TPO: {view.tpo}, 상황: {view.situation}")
+    raise ValueError(f"알 수 없는 분석 단계입니다: {stage}")
+
+
+def build_tasks(user_info: UserInput, current_date: str) -> Dict[str, str]:
+    """
+    분석 단계별 에이전트 입력을 생성합니다.
+    :param user_info: 사용자 정보
+    :param current_date: 현재 날짜 문자열
+    :return: 단계 이름 -> 에이전트 입력
+    """
+    return {stage: build_stage_task(stage, stage_view(stage, user_info, current_date)) for stage in ANALYSIS_STAGES}
+
+
+async def run_stage(agent: CustomAgent, task: str) -> str:
+    result = await agent.aplan(intermediate_steps=[], input=task)
+    return result.return_values["output"]
+
+
+async def prepare_analysis_agent(agent: CustomAgent, stage: str, view: FieldView) -> None:
+    """
+    TOOL_PLANNING이 설정되어 있으면 분석 에이전트에 필요한 검색을 계획하고 병렬로 실행하여 에이전트에 넘깁니다.
+    재시도 밖에서 한 번만 호출하며, 계획이 실패하면 에이전트가 기존처럼 도구를 직접 사용합니다.
+    """
+    if not TOOL_PLANNING:
+        return
+    try:
+        agent.tool_context = await gather_tool_context(agent.llm, agent.role, build_stage_task(stage, view), agent.tools)
+    except Exception as e:
+        logging.warning(f"'{stage}' 단계 검색 계획에 실패하여 계획 없이 진행합니다: {str(e) or type(e).__name__}")
+
+
+async def run_analysis_stage(agent: CustomAgent, stage: str, view: FieldView) -> str:
+    """
+    분석 단계를 실행합니다.
+    REPORT_MODE=template이면 출력을 단계 스키마로 검증(실패 시 한 번 수정 요청)한 JSON 문자열을 반환합니다.
+    """
+    output = await run_stage(agent, build_stage_task(stage, view))
+    if REPORT_MODE == "template":
+        output = (await parse_with_repair(agent.llm, stage, output)).model_dump_json()
+    return output
+
+
+def stage_model(stage: str) -> str:
+    """캐시 키에 사용하는 모델 식별자입니다. 출력 형식(REPORT_MODE)이 다르면 다른 결과로 취급합니다."""
+    return f"{get_model_name(AGENT_SPECS[stage]['agent_name'])}:{REPORT_MODE}"
+
+
+def display_output(stage: str, output: str, user_info: UserInput, current_date: str) -> str:
+    """
+    사용자에게 보여줄 단계 결과입니다.
+    REPORT_MODE=template이면 분석 단계의 JSON 출력을 최종 결과와 같은 Markdown으로 렌더링합니다.
+    """
+    if REPORT_MODE != "template" or stage not in STAGE_SCHEMAS:
+        return output
+    profile = stage_view(REPORT_STAGE, user_info, current_date)
+    return render_section(stage, parse_stage_output(stage, output), profile)
+
+
+def fallback_report(results: Dict[str, str]) -> str:
+    """보고서 단계가 실패했을 때 완료된 분석 결과를 이어 붙여 종합 보고서를 대신합니다."""
+    lines = ["종합 보고서 작성에 실패하여 각 분석 결과를 그대로 제공합니다.", ""]
+    for stage in ANALYSIS_STAGES:
+        lines += [f"## {SECTION_TITLES[stage]}", "", results[stage].strip(), ""]
+    return "\n".join(lines)
+
+
+async def run_pipeline(
+    api_key: str,
+    user_info: UserInput,
+    current_date: str,
+    llms: Optional[Dict[str, Any]] = None,
+    tools: Optional[List[Any]] = None,
+    on_stage_complete: Optional[Callable[[str, str], Any]] = None,
+    cache: Optional[StageCache] = None,
+    prefetched: Optional[Dict[str, Awaitable[str]]] = None,
+    checkpoint: Optional[StageCheckpoint] = None,
+    on_stage_failed: Optional[Callable[[str, Exception], Any]] = None,
+    skip_stages: Collection[str] = (),
+) -> Dict[str, str]:
+    """
+    세 분석 단계를 병렬로 실행한 뒤 최종 보고서를 작성합니다.
+    REPORT_MODE=template이면 보고서는 구조화된 분석 결과로 로컬에서 렌더링하고(보고서 LLM 호출 없음),
+    분석 단계 결과도 Markdown으로 변환하여 반환합니다.
+    cache가 주어지면 단계가 읽는 필드 값과 모델이 같은 이전 결과를 재사용하고,
+    바뀐 필드에 영향을 받는 단계의 에이전트만 생성하여 실행합니다.
+    일시적인 오류는 실패한 단계만 다시 시도하며, 선택 단계(OPTIONAL_STAGES)가 실패하면 해당 내용 없이,
+    보고서 단계가 실패하면 분석 결과를 이어 붙인 보고서로 대신합니다.
+    필수 단계가 실패하거나 호출이 취소되면 실행 중인 나머지 단계도 취소합니다.
+    :param llms: 공유 LLM 클라이언트 (없으면 실행하는 단계의 LLM만 생성)
+    :param tools: 공유 도구 (없으면 실행할 단계가 있을 때 한 번 생성)
+    :param on_stage_complete: 단계가 끝날 때마다 (단계 이름, 결과)로 호출되는 콜백 (코루틴 함수 가능).
+                              예외를 던지면 해당 단계가 실패한 것으로 처리됩니다.
+    :param cache: 단계 결과 캐시 (예: stage_cache.STAGE_CACHE)
+    :param prefetched: 입력이 일치하는 것으로 확인된 추측 실행 결과 (단계 이름 -> awaitable)
+    :param checkpoint: 완료된 단계 결과를 저장할 체크포인트 (모든 단계가 성공하면 삭제)
+    :param on_stage_failed: 단계가 실패하여 대체 결과를 사용할 때 (단계 이름, 예외)로 호출되는 콜백
+    :param skip_stages: 에이전트를 실행하지 않을 선택 단계 (과부하 시 축소 모드).
+                        추측 실행, 캐시, 체크포인트에 결과가 있으면 사용하고 없으면 실패한 단계처럼 처리합니다.
+    :return: 단계 이름 -> 결과 (최종 보고서 포함)
+    """
+    if not set(skip_stages) <= OPTIONAL_STAGES:
+        raise ValueError(f"선택 단계만 생략할 수 있습니다: {', '.join(sorted(set(skip_stages) - OPTIONAL_STAGES))}")
+    shared_tools = tools
+    failed: Dict[str, Exception] = {}
+
+    def get_tools() -> List[Any]:
+        nonlocal shared_tools
+        if shared_tools is None:
+            shared_tools = create_tools()
+        return shared_tools
+
+    async def run_cached(stage: str, run: Callable[[Any], Awaitable[str]], upstream: Sequence[str] = (),
+                         prepare: Optional[Callable[[Any], Awaitable[None]]] = None) -> str:
+        if prefetched and stage in prefetched:
+            try:
+                output = await prefetched[stage]
+            except Exception as e:  # 추측 실행이 취소되거나 실패하면 직접 실행
+                logging.warning(f"'{stage}' 단계 추측 실행 결과를 사용할 수 없습니다: {str(e) or type(e).__name__}")
+            else:
+                await _notify(on_stage_complete, stage, output)
+                return output
+
+        view = stage_view(stage, user_info, current_date)
+        key = stage_key(stage, view, stage_model(stage), upstream)
+        output = cache.get(key) if cache is not None else None
+        if output is None and checkpoint is not None:
+            output = checkpoint.get(stage, key)
+        if output is not None:
+            logging.info(f"'{stage}' 단계 결과를 재사용합니다.")
+            await _notify(on_stage_complete, stage, output)
+            return output
+        if stage in skip_stages:
+            raise StageSkipped("축소 모드로 실행하여 단계를 생략했습니다.")
+
+        with track_stage_memory(stage):
+            agent = await create_agent(stage, api_key, user_info, current_date, llms, get_tools())
+            if prepare is not None:
+                await prepare(agent)
+            output = await retry_with_exponential_backoff(lambda: run(agent))
+        # 콜백이 결과를 거부(예외)하면 단계 실패로 처리되어 캐시와 체크포인트에 저장되지 않음
+        await _notify(on_stage_complete, stage, output)
+        if cache is not None:
+            cache.put(key, output)
+        if checkpoint is not None:
+            await asyncio.to_thread(checkpoint.put, stage, key, output)
+        return output
+
+    async def run_analysis(stage: str) -> str:
+        try:
+            view = stage_view(stage, user_info, current_date)
+            return await run_cached(
+                stage, lambda agent: run_analysis_stage(agent, stage, view),
+                prepare=lambda agent: prepare_analysis_agent(agent, stage, view)
+            )
+        except Exception as e:
+            if stage not in OPTIONAL_STAGES:
+                raise
+            logging.warning(f"'{stage}' 단계가 실패하여 해당 내용 없이 진행합니다: {str(e)}")
+            failed[stage] = e
+            await _notify(on_stage_failed, stage, e)
+            return DEGRADED_NOTICE.format(title=SECTION_TITLES[stage])
+
+    stage_tasks = [asyncio.create_task(run_analysis(stage)) for stage in ANALYSIS_STAGES]
+    try:
+        analyses = await asyncio.gather(*stage_tasks)
+    finally:
+        # 완료된 단계에는 영향이 없고, 실행 중인 단계만 취소됨
+        for task in stage_tasks:
+            task.cancel()
+        await asyncio.gather(*stage_tasks, return_exceptions=True)
+    results = dict(zip(ANALYSIS_STAGES, analyses))
+
+    if REPORT_MODE == "template":
+        structured = {
+            stage: None if stage in failed else parse_stage_output(stage, results[stage])
+            for stage in ANALYSIS_STAGES
+        }
+        profile = stage_view(REPORT_STAGE, user_info, current_date)
+        for stage, data in structured.items():
+            if data is not None:
+                results[stage] = render_section(stage, data, profile)
+        results[REPORT_STAGE] = render_report(profile, structured)
+        await _notify(on_stage_complete, REPORT_STAGE, results[REPORT_STAGE])
+    else:
+        try:
+            results[REPORT_STAGE] = await run_cached(
+                REPORT_STAGE, lambda agent: agent.compile_report(*analyses), upstream=analyses
+            )
+        except Exception as e:
+            logging.error(f"종합 보고서 작성에 실패하여 분석 결과로 대신합니다: {str(e)}")
+            failed[REPORT_STAGE] = e
+            await _notify(on_stage_failed, REPORT_STAGE, e)
+            results[REPORT_STAGE] = fallback_report(results)
+
+    if checkpoint is not None and not failed:
+        await asyncio.to_thread(checkpoint.clear)
+    return results
+
+
+async def _notify(callback: Optional[Callable[[str, str], Any]], stage: str, output: str) -> None:
+    if callback is None:
+        return
+    result = callback(stage, output)
+    if inspect.isawaitable(result):
+        await result
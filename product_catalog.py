@@ -0,0 +1,271 @@
+# product_catalog.py
+
+import csv
+import json
+import logging
+import math
+import numbers
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain.tools import Tool
+
+# 카탈로그 파일에서 읽어들이는 컬럼
+CATALOG_COLUMNS = ["product_id", "name", "brand", "category", "gender", "price", "color", "tpo_tags", "url"]
+# 필터링에 사용하는 범주형 컬럼 (정수 코드로 인코딩)
+CATEGORICAL_COLUMNS = ["brand", "category", "gender", "color"]
+# 성별 필터 시 함께 허용되는 공용 표기
+UNISEX_LABELS = {"공용", "unisex"}
+TAG_SEPARATOR = "|"
+DEFAULT_QUERY_LIMIT = 10
+MAX_QUERY_LIMIT = 50
+
+
+class ProductCatalog:
+    """
+    상품 카탈로그를 컬럼 단위 NumPy 배열로 보관하는 인메모리 인덱스입니다.
+    범주형 컬럼은 정수 코드로, TPO 태그는 불리언 행렬로 인코딩하여
+    필터링과 정렬을 벡터 연산만으로 처리합니다.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        # 가격이 없거나 해석할 수 없는 상품은 0원으로 취급하면 예산 필터를 항상 통과하므로 제외
+        prices = [_parse_price(r.get("price")) for r in records]
+        invalid = sum(price is None for price in prices)
+        if invalid:
+            logging.warning(f"가격이 올바르지 않은 상품 {invalid}개를 카탈로그에서 제외합니다.")
+            records = [r for r, price in zip(records, prices) if price is not None]
+            prices = [price for price in prices if price is not None]
+
+        self.size = len(records)
+        self.product_id = np.array([str(r.get("product_id", i)) for i, r in enumerate(records)], dtype=object)
+        self.name = np.array([str(r.get("name", "")) for r in records], dtype=object)
+        self.url = np.array([str(r.get("url", "") or "") for r in records], dtype=object)
+        self.price = np.array(prices, dtype=np.int64)
+
+        # 범주형 컬럼: 값 -> 코드 사전과 코드 배열
+        self._vocab: Dict[str, Dict[str, int]] = {}
+        self._labels: Dict[str, np.ndarray] = {}
+        self._codes: Dict[str, np.ndarray] = {}
+        for column in CATEGORICAL_COLUMNS:
+            values = [_normalize(r.get(column)) for r in records]
+            vocab = {value: code for code, value in enumerate(sorted(set(values)))}
+            self._vocab[column] = vocab
+            self._labels[column] = np.array([str(r.get(column, "") or "").strip() for r in records], dtype=object)
+            self._codes[column] = np.array([vocab[value] for value in values], dtype=np.int32)
+
+        # TPO 태그: (상품 수 x 태그 수) 불리언 행렬
+        tag_lists = [_split_tags(r.get("tpo_tags")) for r in records]
+        self._tag_vocab = {tag: i for i, tag in enumerate(sorted({t for tags in tag_lists for t in tags}))}
+        self._tag_matrix = np.zeros((self.size, max(len(self._tag_vocab), 1)), dtype=bool)
+        for row, tags in enumerate(tag_lists):
+            for tag in tags:
+                self._tag_matrix[row, self._tag_vocab[tag]] = True
+        self._tag_labels = np.array([TAG_SEPARATOR.join(tags) for tags in tag_lists], dtype=object)
+
+    @classmethod
+    def from_file(cls, path: str) -> "ProductCatalog":
+        """
+        CSV 또는 Parquet 파일에서 카탈로그를 로드합니다.
+        :param path: 카탈로그 파일 경로 (.csv, .parquet)
+        :return: 로드된 ProductCatalog 객체
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".parquet":
+            try:
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise ImportError("Parquet 카탈로그를 읽으려면 pyarrow를 설치해야 합니다: pip install pyarrow") from e
+            records = pq.read_table(path).to_pylist()
+        elif extension == ".csv":
+            with open(path, newline="", encoding="utf-8-sig") as file:
+                records = list(csv.DictReader(file))
+        else:
+            raise ValueError(f"지원하지 않는 카탈로그 형식입니다: {path}")
+
+        catalog = cls(records)
+        logging.info(f"상품 카탈로그 {catalog.size}개 항목을 {path}에서 로드했습니다.")
+        return catalog
+
+    def _mask(self, column: str, value: Optional[str]) -> Optional[np.ndarray]:
+        if not value:
+            return None
+        code = self._vocab[column].get(_normalize(value))
+        mask = self._codes[column] == code if code is not None else np.zeros(self.size, dtype=bool)
+        if column == "gender":
+            for label in UNISEX_LABELS:
+                unisex_code = self._vocab[column].get(label)
+                if unisex_code is not None:
+                    mask |= self._codes[column] == unisex_code
+        return mask
+
+    def filter_indices(
+        self,
+        category: Optional[str] = None,
+        gender: Optional[str] = None,
+        brand: Optional[str] = None,
+        color: Optional[str] = None,
+        tpo: Optional[str] = None,
+        min_price: Optional[int] = None,
+        max_price: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        조건에 맞는 상품의 행 인덱스를 반환합니다.
+        :param tpo: TPO 태그 (여러 개는 쉼표 또는 '|'로 구분, 하나라도 일치하면 포함)
+        :return: 조건을 만족하는 행 인덱스 배열
+        """
+        mask = np.ones(self.size, dtype=bool)
+        for column, value in (("category", category), ("gender", gender), ("brand", brand), ("color", color)):
+            column_mask = self._mask(column, value)
+            if column_mask is not None:
+                mask &= column_mask
+        if min_price is not None:
+            mask &= self.price >= int(min_price)
+        if max_price is not None:
+            mask &= self.price <= int(max_price)
+        if tpo:
+            tag_ids = [self._tag_vocab[t] for t in _split_tags(tpo.replace(",", TAG_SEPARATOR)) if t in self._tag_vocab]
+            mask &= self._tag_matrix[:, tag_ids].any(axis=1) if tag_ids else False
+        return np.flatnonzero(mask)
+
+    def tag_match_counts(self, indices: np.ndarray, tpo: str) -> np.ndarray:
+        """주어진 행들이 가진 TPO 태그 중 요청 태그와 일치하는 개수를 반환합니다."""
+        tag_ids = [self._tag_vocab[t] for t in _split_tags(tpo.replace(",", TAG_SEPARATOR)) if t in self._tag_vocab]
+        if not tag_ids:
+            return np.zeros(len(indices), dtype=np.int64)
+        return self._tag_matrix[np.asarray(indices)][:, tag_ids].sum(axis=1)
+
+    def query(self, sort_by: str = "price", descending: bool = False, limit: int = DEFAULT_QUERY_LIMIT, **filters) -> List[Dict[str, Any]]:
+        """
+        필터 조건에 맞는 상품을 정렬하여 반환합니다.
+        :param sort_by: 정렬 기준 ("price" 또는 "name")
+        :param descending: 내림차순 정렬 여부
+        :param limit: 반환할 최대 상품 수
+        :param filters: filter_indices에 전달할 필터 조건
+        :return: 상품 정보 딕셔너리 리스트
+        """
+        indices = self.filter_indices(**filters)
+        if sort_by == "name":
+            order = np.argsort(self.name[indices].astype(str), kind="stable")
+        else:
+            order = np.argsort(self.price[indices], kind="stable")
+        if descending:
+            order = order[::-1]
+        return [self.row(i) for i in indices[order][:max(0, min(limit, MAX_QUERY_LIMIT))]]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        return {
+            "product_id": self.product_id[index],
+            "name": self.name[index],
+            "brand": self._labels["brand"][index],
+            "category": self._labels["category"][index],
+            "gender": self._labels["gender"][index],
+            "price": int(self.price[index]),
+            "color": self._labels["color"][index],
+            "tpo_tags": self._tag_labels[index],
+            "url": self.url[index],
+        }
+
+
+def _normalize(value: Any) -> str:
+    return str(value or "").strip().lower()
+
+
+def _split_tags(value: Any) -> List[str]:
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value if _normalize(v)]
+    return [t for t in (_normalize(v) for v in str(value or "").split(TAG_SEPARATOR)) if t]
+
+
+def _parse_price(value: Any) -> Optional[int]:
+    """
+    가격 값을 원 단위 정수로 변환합니다. 통화 기호와 천 단위 구분 쉼표는 무시하고 소수는 반올림합니다.
+    예: "39,900원" -> 39900, "₩39900.0" -> 39900, 12000.6 -> 12001
+    :return: 가격 (비어 있거나, 음수이거나, 해석할 수 없으면 None)
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, numbers.Real):
+        number = float(value)
+    else:
+        text = re.sub(r"[^\d.,+-]", "", str(value)).replace(",", "")
+        try:
+            number = float(text)
+        except ValueError:
+            return None
+    if not math.isfinite(number) or number < 0:
+        return None
+    return int(round(number))
+
+
+def parse_tool_input(text: str) -> Dict[str, str]:
+    """
+    에이전트가 전달한 도구 입력을 딕셔너리로 변환합니다.
+    JSON 객체 또는 "key=value, key=value" 형식을 모두 허용합니다.
+    """
+    text = (text or "").strip().strip("`")
+    if text.startswith("{"):
+        try:
+            return {str(k): str(v) for k, v in json.loads(text).items()}
+        except (json.JSONDecodeError, AttributeError):
+            pass
+    params = {}
+    # 값 안의 쉼표(예: tpo=결혼식, 하객)는 유지하고, 새로운 "key=" 앞의 쉼표에서만 나눔
+    for part in re.split(r"\n|,\s*(?=\w+\s*=)", text):
+        if "=" in part:
+            key, value = part.split("=", 1)
+            params[key.strip().lower()] = value.strip().strip("\"'")
+    return params
+
+
+def format_products(products: List[Dict[str, Any]]) -> str:
+    if not products:
+        return "조건에 맞는 상품이 카탈로그에 없습니다."
+    return "\n".join(
+        f"- [{p['category']}] {p['brand']} {p['name']} / {p['color']} / {p['price']:,}원 / {p['url']}"
+        for p in products
+    )
+
+
+@lru_cache(maxsize=4)
+def load_catalog(path: str) -> ProductCatalog:
+    """동일 경로의 카탈로그는 프로세스 내에서 한 번만 로드합니다."""
+    return ProductCatalog.from_file(path)
+
+
+def create_catalog_tool(catalog: ProductCatalog) -> Tool:
+    def search_catalog(tool_input: str) -> str:
+        params = parse_tool_input(tool_input)
+        prices = {key: _parse_price(params[key]) for key in ("min_price", "max_price") if params.get(key)}
+        invalid = [key for key, price in prices.items() if price is None]
+        if invalid:
+            return f"카탈로그 검색 입력이 올바르지 않습니다: {', '.join(invalid)}는 0 이상의 금액이어야 합니다."
+        try:
+            products = catalog.query(
+                category=params.get("category"),
+                gender=params.get("gender"),
+                brand=params.get("brand"),
+                color=params.get("color"),
+                tpo=params.get("tpo"),
+                min_price=prices.get("min_price"),
+                max_price=prices.get("max_price"),
+                sort_by=params.get("sort_by", "price"),
+                descending=params.get("order", "asc").lower() == "desc",
+                limit=int(params.get("limit", DEFAULT_QUERY_LIMIT)),
+            )
+        except ValueError as e:
+            return f"카탈로그 검색 입력이 올바르지 않습니다: {e}"
+        return format_products(products)
+
+    return Tool(
+        name="Product Catalog",
+        func=search_catalog,
+        description=(
+            "실제 판매 중인 상품 카탈로그에서 가격과 조건으로 상품을 빠르게 검색합니다. "
+            "입력 형식: category=상의, gender=남성, max_price=100000, tpo=결혼식, color=네이비, brand=..., "
+            "sort_by=price, order=asc, limit=10"
+        )
+    )
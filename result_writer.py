@@ -0,0 +1,240 @@
+# result_writer.py
+
+import asyncio
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+import zipfile
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config import RESULT_FORMATS, RESULT_OUTPUT_DIR, SESSION_STORE_DIR, SESSION_STORE_TTL
+
+# 결과 섹션 제목 (저장 순서)
+SECTION_TITLES = {
+    "user_analysis": "체형 분석",
+    "trend_analysis": "트렌드 분석",
+    "style_recommendations": "스타일 추천",
+    "final_report": "종합 보고서",
+}
+SUPPORTED_FORMATS = ("txt", "md", "json", "json.gz", "zip")
+BATCH_SIZE = 32
+BATCH_INTERVAL = 0.5  # 배치 모드에서 쓰기를 모으는 최대 대기 시간 (초)
+
+
+def _safe_name(text: str, max_length: int = 40) -> str:
+    """파일 이름에 쓸 수 없는 문자를 제거합니다 (한글은 유지)."""
+    name = re.sub(r"[^\w\-]+", "_", text or "").strip("_")
+    return name[:max_length] or "결과"
+
+
+def _render_markdown(results: Dict[str, str], situation: str) -> str:
+    lines = [f"# 패션 분석 및 추천 보고서 - {situation}", ""]
+    for key, title in SECTION_TITLES.items():
+        if results.get(key):
+            lines += [f"## {title}", "", results[key].strip(), ""]
+    return "\n".join(lines)
+
+
+def _encode(results: Dict[str, str], situation: str, created_at: str, fmt: str) -> bytes:
+    if fmt == "txt":
+        return results.get("final_report", "").encode("utf-8")
+    if fmt == "md":
+        return _render_markdown(results, situation).encode("utf-8")
+
+    document = json.dumps(
+        {"situation": situation, "created_at": created_at, "sections": results},
+        ensure_ascii=False, indent=2
+    ).encode("utf-8")
+    if fmt == "json":
+        return document
+    if fmt == "json.gz":
+        return gzip.compress(document)
+    if fmt == "zip":
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("report.md", _render_markdown(results, situation))
+            archive.writestr("result.json", document)
+            for key, text in results.items():
+                archive.writestr(f"{key}.txt", text)
+        return buffer.getvalue()
+    raise ValueError(f"지원하지 않는 출력 형식입니다: {fmt}")
+
+
+def _current_umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# mkstemp는 0600으로 파일을 만들므로, 일반 파일처럼 umask를 따르는 권한으로 바꿔서 저장
+_FILE_MODE = 0o666 & ~_current_umask()
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    """같은 디렉토리의 임시 파일에 쓴 뒤 rename하여 부분 기록된 파일이 보이지 않게 합니다."""
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(temp_path, _FILE_MODE)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+class ResultWriter:
+    """
+    분석 결과를 이벤트 루프 밖(스레드)에서 저장합니다.
+    파일 이름에 시각과 고유 ID를 붙여 같은 상황의 동시 실행이 서로 덮어쓰지 않습니다.
+    batch=True이면 여러 요청의 쓰기를 모아 한 번의 스레드 작업으로 처리합니다.
+    """
+
+    def __init__(self, output_dir: str = RESULT_OUTPUT_DIR, formats: Sequence[str] = RESULT_FORMATS, batch: bool = False):
+        unknown = [fmt for fmt in formats if fmt not in SUPPORTED_FORMATS]
+        if unknown:
+            raise ValueError(f"지원하지 않는 출력 형식입니다: {', '.join(unknown)}")
+        self.output_dir = output_dir
+        self.formats = tuple(formats)
+        self.batch = batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    def _build_paths(self, situation: str) -> Tuple[str, List[str]]:
+        now = datetime.now()
+        stem = f"{now:%y%m%d}_{_safe_name(situation)}_패션_분석_및_추천_{now:%H%M%S}_{uuid.uuid4().hex[:8]}"
+        return now.isoformat(), [os.path.join(self.output_dir, f"{stem}.{fmt}") for fmt in self.formats]
+
+    def _write_job(self, results: Dict[str, str], situation: str) -> List[str]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        created_at, paths = self._build_paths(situation)
+        for fmt, path in zip(self.formats, paths):
+            _atomic_write(path, _encode(results, situation, created_at, fmt))
+        return paths
+
+    def _write_batch(self, jobs: List[Tuple[Dict[str, str], str]]) -> List[object]:
+        outcomes: List[object] = []
+        for results, situation in jobs:
+            try:
+                outcomes.append(self._write_job(results, situation))
+            except Exception as e:  # 한 건의 실패가 같은 배치의 다른 결과에 영향을 주지 않도록 함
+                outcomes.append(e)
+        return outcomes
+
+    async def write(self, results: Dict[str, str], situation: str) -> List[str]:
+        """
+        결과를 설정된 모든 형식으로 저장합니다.
+        :param results: 섹션 이름 -> 내용 (final_report 포함)
+        :param situation: 파일 이름에 사용할 상황 설명
+        :return: 저장된 파일 경로 리스트
+        """
+        if not self.batch:
+            paths = await asyncio.to_thread(self._write_job, results, situation)
+        else:
+            if self._flusher is None or self._flusher.done():
+                self._queue = asyncio.Queue()
+                self._flusher = asyncio.create_task(self._flush_loop())
+            future = asyncio.get_running_loop().create_future()
+            await self._queue.put((results, situation, future))
+            paths = await future
+        for path in paths:
+            logging.info(f"최종 보고서가 {path}에 저장되었습니다.")
+        return paths
+
+    async def _flush_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            pending, closing = [item], False
+            deadline = loop.time() + BATCH_INTERVAL
+            while len(pending) < BATCH_SIZE and loop.time() < deadline:
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                pending.append(item)
+
+            try:
+                outcomes = await asyncio.to_thread(self._write_batch, [(r, s) for r, s, _ in pending])
+            except Exception as e:
+                outcomes = [e] * len(pending)
+            for (_, _, future), outcome in zip(pending, outcomes):
+                if future.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+            if closing:
+                return
+
+    async def close(self) -> None:
+        """배치 모드의 백그라운드 작업을 종료합니다. 이미 요청된 쓰기는 모두 완료됩니다."""
+        if self._flusher is None or self._flusher.done():
+            return
+        await self._queue.put(None)
+        await self._flusher
+        self._flusher = None
+
+
+class ResultStore:
+    """
+    세션 결과를 디스크에 보관하고 짧은 핸들로 다시 읽습니다.
+    큰 결과를 Streamlit 세션 상태 대신 여기에 두어 세션당 메모리를 줄입니다.
+    """
+
+    def __init__(self, directory: str = SESSION_STORE_DIR, ttl: float = SESSION_STORE_TTL):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, handle: str) -> str:
+        if not re.fullmatch(r"[0-9a-f]{32}", handle):
+            raise ValueError(f"잘못된 결과 핸들입니다: {handle}")
+        return os.path.join(self.directory, f"{handle}.json.gz")
+
+    def put(self, results: Dict[str, str]) -> str:
+        """결과를 저장하고 핸들을 반환합니다. 저장할 때 만료된 결과를 함께 정리합니다."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.sweep()
+        handle = uuid.uuid4().hex
+        _atomic_write(self._path(handle), gzip.compress(json.dumps(results, ensure_ascii=False).encode("utf-8")))
+        return handle
+
+    def get(self, handle: str) -> Optional[Dict[str, str]]:
+        try:
+            with open(self._path(handle), "rb") as file:
+                return json.loads(gzip.decompress(file.read()).decode("utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def delete(self, handle: str) -> None:
+        try:
+            os.unlink(self._path(handle))
+        except FileNotFoundError:
+            pass
+
+    def sweep(self) -> None:
+        """종료된 세션이 남긴 만료 결과를 삭제합니다."""
+        cutoff = time.time() - self.ttl
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json.gz") and entry.stat().st_mtime < cutoff:
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,306 @@
+# retrieval_index.py
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.tools import Tool
+
+EMBEDDING_DIM = 512
+INITIAL_CAPACITY = 1024
+CHUNK_SIZE = 600          # 문서 조각 최대 길이 (문자)
+CACHE_TTL_SECONDS = 7 * 24 * 3600  # 캐시된 검색 결과 유효 기간
+DEFAULT_TOP_K = 5
+
+
+class HashingEmbedder:
+    """
+    단어와 문자 3-gram을 해싱 트릭으로 고정 차원 벡터에 투영하는 경량 임베더입니다.
+    외부 모델 없이 한국어 검색어의 부분 일치도 반영하며, 결과는 L2 정규화됩니다.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    @staticmethod
+    def _features(text: str) -> List[str]:
+        words = re.findall(r"\w+", text.lower())
+        features = list(words)
+        for word in words:
+            padded = f" {word} "
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+
+class RetrievalIndex:
+    """
+    임베딩 행렬은 메모리 맵 파일에, 메타데이터는 JSONL 파일에 저장하는 로컬 벡터 인덱스입니다.
+    검색은 NumPy 전수 내적으로 수행하며, faiss가 설치되어 있으면 HNSW 근사 인덱스를 사용할 수 있습니다.
+    메타데이터는 행별 파일 오프셋만 메모리에 두고 검색된 행만 디스크에서 읽습니다.
+    """
+
+    def __init__(self, directory: str, embed_fn: Optional[Callable[[List[str]], np.ndarray]] = None,
+                 dim: int = EMBEDDING_DIM, use_ann: bool = False):
+        self.directory = directory
+        self.embed_fn = embed_fn or HashingEmbedder(dim)
+        self.dim = dim
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._matrix_path = os.path.join(directory, "embeddings.f32")
+        self._metadata_path = os.path.join(directory, "metadata.jsonl")
+
+        # 메타데이터 오프셋과 중복 제거용 해시 복원 (행 수는 메타데이터 기준)
+        self._offsets: List[int] = []
+        self._hashes = set()
+        if os.path.exists(self._metadata_path):
+            with open(self._metadata_path, "rb") as file:
+                offset = 0
+                for line in file:
+                    self._offsets.append(offset)
+                    self._hashes.add(json.loads(line).get("hash"))
+                    offset += len(line)
+        self.count = len(self._offsets)
+
+        capacity = max(INITIAL_CAPACITY, self.count)
+        if os.path.exists(self._matrix_path):
+            capacity = max(capacity, os.path.getsize(self._matrix_path) // (4 * dim))
+        self._open_matrix(capacity)
+
+        self._ann = None
+        if use_ann:
+            self._build_ann()
+
+    def _open_matrix(self, capacity: int) -> None:
+        with open(self._matrix_path, "ab") as file:
+            if file.tell() < capacity * self.dim * 4:
+                file.truncate(capacity * self.dim * 4)
+        self.capacity = capacity
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _build_ann(self) -> None:
+        try:
+            import faiss
+        except ImportError as e:
+            raise ImportError("근사 검색 인덱스를 사용하려면 faiss를 설치해야 합니다: pip install faiss-cpu") from e
+        self._ann = faiss.IndexHNSWFlat(self.dim, 32, faiss.METRIC_INNER_PRODUCT)
+        if self.count:
+            self._ann.add(np.ascontiguousarray(self._matrix[:self.count]))
+
+    def add(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None, dedupe: bool = True) -> int:
+        """
+        문서를 임베딩하여 인덱스에 추가합니다.
+        :param texts: 임베딩할 문서 텍스트 리스트
+        :param metadatas: 문서별 메타데이터 (JSON 직렬화 가능해야 함)
+        :param dedupe: 같은 출처의 동일한 문서를 건너뛸지 여부
+        :return: 새로 추가된 문서 수
+        """
+        metadatas = metadatas or [{} for _ in texts]
+        rows, seen = [], set()
+        for text, metadata in zip(texts, metadatas):
+            digest = hashlib.sha1(f"{metadata.get('source', '')}\n{text}".encode("utf-8")).hexdigest()
+            if not dedupe or (digest not in self._hashes and digest not in seen):
+                seen.add(digest)
+                rows.append(dict(metadata, text=text, hash=digest))
+        if not rows:
+            return 0
+
+        vectors = self.embed_fn([row["text"] for row in rows]).astype(np.float32)
+        with self._lock:
+            # 임베딩 계산 중 다른 스레드가 같은 문서를 추가했을 수 있으므로 다시 확인
+            keep = [i for i, row in enumerate(rows) if not dedupe or row["hash"] not in self._hashes]
+            rows, vectors = [rows[i] for i in keep], vectors[keep]
+            if self.count + len(rows) > self.capacity:
+                self._matrix.flush()
+                self._open_matrix(max(self.capacity * 2, self.count + len(rows)))
+            self._matrix[self.count:self.count + len(rows)] = vectors
+            self._matrix.flush()
+
+            with open(self._metadata_path, "ab") as file:
+                for metadata in rows:
+                    self._offsets.append(file.tell())
+                    file.write((json.dumps(metadata, ensure_ascii=False) + "\n").encode("utf-8"))
+                    self._hashes.add(metadata["hash"])
+            if self._ann is not None:
+                self._ann.add(vectors)
+            self.count += len(rows)
+        return len(rows)
+
+    def search(self, query: str, k: int = DEFAULT_TOP_K, where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+               min_score: float = 0.0) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        질의와 가장 유사한 문서를 찾습니다.
+        :param query: 검색어
+        :param k: 반환할 최대 문서 수
+        :param where: 메타데이터 조건 (조건을 만족하는 문서만 반환)
+        :param min_score: 최소 코사인 유사도
+        :return: (유사도, 메타데이터) 리스트, 유사도 내림차순
+        """
+        if self.count == 0 or k <= 0:
+            return []
+        q = self.embed_fn([query])[0].astype(np.float32)
+        # 조건 필터로 일부가 걸러질 수 있으므로 여유 있게 후보를 뽑음
+        fetch = min(self.count, k * 8 if where else k)
+        with self._lock:
+            count = self.count
+            if self._ann is not None:
+                scores, ids = self._ann.search(q[None, :], fetch)
+                candidates = [(float(s), int(i)) for s, i in zip(scores[0], ids[0]) if i >= 0]
+            else:
+                scores = self._matrix[:count] @ q
+                top = np.argpartition(-scores, fetch - 1)[:fetch] if fetch < count else np.arange(count)
+                top = top[np.argsort(-scores[top])]
+                candidates = [(float(scores[i]), int(i)) for i in top]
+
+        results = []
+        for score, row in candidates:
+            if score < min_score:
+                break
+            metadata = self.get(row)
+            if where is None or where(metadata):
+                results.append((score, metadata))
+                if len(results) >= k:
+                    break
+        return results
+
+    def get(self, row: int) -> Dict[str, Any]:
+        with open(self._metadata_path, "rb") as file:
+            file.seek(self._offsets[row])
+            return json.loads(file.readline())
+
+
+def split_into_chunks(text: str, size: int = CHUNK_SIZE) -> List[str]:
+    """문단/문장 경계를 우선하여 텍스트를 size 이하의 조각으로 나눕니다."""
+    parts = [p.strip() for p in re.split(r"\n+|(?<=[.!?다])\s+", text or "") if p.strip()]
+    chunks, current = [], ""
+    for part in parts:
+        if current and len(current) + len(part) + 1 > size:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {part}".strip()
+        while len(current) > size:
+            chunks.append(current[:size])
+            current = current[size:]
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def normalize_query(query: str) -> str:
+    """검색어 캐시 키 (대소문자, 공백, 문장 부호 차이만 무시)."""
+    return " ".join(re.findall(r"\w+", query.lower()))
+
+
+class LocalKnowledgeBase:
+    """
+    검색 도구 호출 결과를 로컬에 축적하여 반복되는 검색은 네트워크 없이 응답합니다.
+    - queries.jsonl: 이전 검색어와 그 결과를 덧붙여 기록하는 로그 (같은 도구의 같은 검색어만 재사용)
+    - documents: 검색 결과를 나눈 문서 조각의 벡터 인덱스 (로컬 지식 검색 도구)
+    유사도 검색은 로컬 지식 검색에만 사용하고 도구 호출을 건너뛰는 데는 사용하지 않습니다.
+    성별이나 예산만 다른 검색어도 유사도가 매우 높아, 다른 고객의 검색 결과가 재사용될 수 있기 때문입니다.
+    검색어 로그는 정확히 일치하는 조회에만 쓰이므로 임베딩하지 않으며, 시작 시 한 번 순차로 읽어
+    검색어별 최신 기록의 파일 오프셋만 메모리에 두고 결과 본문은 적중했을 때 디스크에서 읽습니다.
+    """
+
+    def __init__(self, directory: str, use_ann: bool = False):
+        os.makedirs(directory, exist_ok=True)
+        self._query_log = os.path.join(directory, "queries.jsonl")
+        self.documents = RetrievalIndex(os.path.join(directory, "documents"), use_ann=use_ann)
+        # (도구 이름, 정규화한 검색어) -> (가장 최근 기록의 로그 오프셋, 수집 시각)
+        self._exact: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._exact_lock = threading.Lock()
+        if os.path.exists(self._query_log):
+            with open(self._query_log, "rb+") as file:
+                offset = 0
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        # 기록 도중 중단된 마지막 줄은 다음 기록과 이어 붙지 않도록 잘라냄
+                        file.truncate(offset)
+                        break
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        logging.warning(f"검색어 로그의 손상된 기록을 건너뜁니다 (오프셋 {offset})")
+                    else:
+                        self._remember(record["source"], record["query"], offset, record["fetched_at"])
+                    offset += len(line)
+
+    def _remember(self, source: str, query: str, offset: int, fetched_at: float) -> None:
+        key = (source, normalize_query(query))
+        with self._exact_lock:
+            previous = self._exact.get(key)
+            if previous is None or previous[1] <= fetched_at:
+                self._exact[key] = (offset, fetched_at)
+
+    def lookup(self, source: str, query: str) -> Optional[str]:
+        with self._exact_lock:
+            entry = self._exact.get((source, normalize_query(query)))
+        if entry is None or time.time() - entry[1] >= CACHE_TTL_SECONDS:
+            return None
+        with open(self._query_log, "rb") as file:
+            file.seek(entry[0])
+            return json.loads(file.readline())["result"]
+
+    def ingest(self, source: str, query: str, result: str) -> None:
+        fetched_at = time.time()
+        record = {"source": source, "query": query, "result": result, "fetched_at": fetched_at}
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        # 유효 기간이 지나 다시 가져온 결과도 기록되도록 같은 검색어도 덧붙임 (조회는 가장 최근 기록 사용)
+        with self._exact_lock:
+            with open(self._query_log, "ab") as file:
+                offset = file.tell()
+                file.write(line)
+        self._remember(source, query, offset, fetched_at)
+        chunks = split_into_chunks(result)
+        self.documents.add(chunks, [{"source": source, "query": query, "fetched_at": fetched_at} for _ in chunks])
+
+    def cached_tool(self, tool: Tool) -> Tool:
+        """같은 검색어의 결과가 로컬에 있으면 재사용하고, 없으면 원래 도구를 호출한 뒤 저장합니다."""
+        def run(query: str) -> str:
+            cached = self.lookup(tool.name, query)
+            if cached is not None:
+                logging.info(f"[{tool.name}] 로컬 인덱스에서 응답: {query}")
+                return cached
+            result = tool.func(query)
+            try:
+                self.ingest(tool.name, query, str(result))
+            except Exception as e:
+                logging.warning(f"검색 결과를 로컬 인덱스에 저장하지 못했습니다: {e}")
+            return result
+
+        return Tool(name=tool.name, func=run, description=tool.description)
+
+    def as_tool(self) -> Tool:
+        def search(query: str) -> str:
+            hits = self.documents.search(query, k=DEFAULT_TOP_K)
+            if not hits:
+                return "로컬 지식 베이스에 관련 자료가 없습니다."
+            return "\n".join(f"- ({m['source']}, 유사도 {score:.2f}) {m['text']}" for score, m in hits)
+
+        return Tool(
+            name="Local Knowledge Search",
+            func=search,
+            description="이전에 수집한 패션 트렌드·스타일 자료를 로컬 인덱스에서 빠르게 검색합니다. 웹 검색 전에 먼저 사용하세요."
+        )
+
+
+@lru_cache(maxsize=4)
+def load_knowledge_base(directory: str, use_ann: bool = False) -> LocalKnowledgeBase:
+    """동일 경로의 지식 베이스는 프로세스 내에서 하나만 열어 공유합니다."""
+    return LocalKnowledgeBase(directory, use_ann=use_ann)
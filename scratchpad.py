@@ -0,0 +1,106 @@
+# scratchpad.py
+
+import logging
+import re
+from typing import Iterable, List, Set, Tuple
+
+from langchain.schema import AgentAction
+
+from config import SCRATCHPAD_OBSERVATION_CHARS, SCRATCHPAD_RECENT_STEPS, SCRATCHPAD_SUMMARY_CHARS
+
+# 검색 결과를 문장/결과 단위로 나누는 구분자 (줄바꿈, 문장 끝, YouTube 결과 목록의 항목 구분)
+_SEGMENT_SPLIT = re.compile(r"\n+|(?<=[.!?])\s+|',\s*'")
+
+
+def _segments(observation: str) -> List[str]:
+    return [segment.strip(" []'\t") for segment in _SEGMENT_SPLIT.split(observation) if segment.strip(" []'\t")]
+
+
+def _normalize(segment: str) -> str:
+    """중복 판단용 키 (대소문자, 공백, 문장 부호 차이 무시)."""
+    return " ".join(re.findall(r"\w+", segment.lower()))
+
+
+def _truncate(text: str, budget: int) -> str:
+    return text if len(text) <= budget else text[:max(budget - 1, 0)].rstrip() + "…"
+
+
+def compact_observation(observation: str, query: str, seen: Set[str], budget: int = SCRATCHPAD_OBSERVATION_CHARS) -> str:
+    """
+    도구 결과를 예산(글자 수) 안으로 줄입니다.
+    이전 단계에서 이미 본 문장은 제거하고, 예산을 넘으면 도구 입력과 겹치는 단어가 많은 문장을
+    원래 순서대로 남긴 뒤 생략한 개수를 표시합니다 (추가 LLM 호출 없음).
+    :param query: 도구 입력 (관련도 계산용)
+    :param seen: 지금까지 본 문장의 키 (호출 시 갱신됨)
+    """
+    segments = []
+    duplicates = 0
+    for segment in _segments(str(observation)):
+        key = _normalize(segment)
+        if not key:
+            continue
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        segments.append(segment)
+
+    if not segments:
+        # 단어가 없는 결과(기호만 있는 경우 등)는 나눌 수 없으므로 그대로 예산에 맞춰 자름
+        return "(이전 결과와 같은 내용)" if duplicates else _truncate(str(observation).strip(), budget)
+    text = " ".join(segments)
+    if len(text) <= budget:
+        return text
+
+    # 생략 표시도 예산에 포함되도록 가장 긴 경우의 길이만큼 남겨 둠
+    available = budget - len(f" (결과 {len(segments)}개 중 {len(segments)}개 생략)")
+    if available < 2:
+        return _truncate(text, budget)
+    terms = set(_normalize(query).split())
+    ranked = sorted(range(len(segments)), key=lambda i: (-len(terms & set(_normalize(segments[i]).split())), i))
+    selected, used = set(), -1  # 첫 조각 앞에는 구분 공백이 없음
+    for index in ranked:
+        length = min(len(segments[index]), available // 2) + 1
+        if used + length > available:
+            continue
+        selected.add(index)
+        used += length
+    kept = [_truncate(segments[i], available // 2) for i in sorted(selected)]
+    return " ".join(kept) + f" (결과 {len(segments)}개 중 {len(segments) - len(kept)}개 생략)"
+
+
+def summarize_step(action: AgentAction, observation: str, budget: int = SCRATCHPAD_SUMMARY_CHARS) -> str:
+    """오래된 단계를 도구 호출과 결과 앞부분만 남긴 한 줄로 줄입니다."""
+    tool_input = _truncate(" ".join(str(action.tool_input).split()), 60)
+    return f"- {action.tool}({tool_input}): {_truncate(' '.join(observation.split()), budget)}"
+
+
+def format_compacted_scratchpad(
+    intermediate_steps: Iterable[Tuple[AgentAction, str]],
+    recent_steps: int = SCRATCHPAD_RECENT_STEPS,
+    observation_budget: int = SCRATCHPAD_OBSERVATION_CHARS,
+    summary_budget: int = SCRATCHPAD_SUMMARY_CHARS,
+) -> str:
+    """
+    format_log_to_str를 대신하는 스크래치패드 구성 함수입니다.
+    모든 도구 결과를 compact_observation으로 줄이고, 최근 recent_steps개 단계만 원래 형식으로 남기며
+    그 이전 단계는 한 줄 요약으로 바꿉니다. 반복 횟수가 늘어도 프롬프트가 단계 수에 비례해서만 커집니다.
+    """
+    steps = list(intermediate_steps)
+    if not steps:
+        return ""
+    seen: Set[str] = set()
+    compacted = [(action, compact_observation(observation, str(action.tool_input), seen, observation_budget))
+                 for action, observation in steps]
+
+    split = max(len(compacted) - recent_steps, 0)
+    thoughts = ""
+    if split:
+        thoughts += "\n(이전 단계 요약)\n" + "\n".join(summarize_step(a, o, summary_budget) for a, o in compacted[:split]) + "\n"
+    for action, observation in compacted[split:]:
+        thoughts += action.log
+        thoughts += f"\nObservation: {observation}\nThought: "
+
+    raw = sum(len(action.log) + len(str(observation)) for action, observation in steps)
+    logging.debug(f"스크래치패드 압축: {len(steps)}단계, {raw}자 -> {len(thoughts)}자")
+    return thoughts
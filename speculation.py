@@ -0,0 +1,159 @@
+# speculation.py
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Dict, Set
+
+from agent_config import create_agent, create_tools
+from pipeline import ANALYSIS_STAGES, prepare_analysis_agent, run_analysis_stage, stage_model
+from stage_cache import STAGE_CACHE, STAGE_FIELDS, FieldView, StageCache, stage_key
+
+
+async def _await_speculation(future: concurrent.futures.Future) -> str:
+    """다른 스레드의 추측 실행 결과를 기다립니다. 추측 실행만 취소된 경우 일반 예외로 바꿉니다."""
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        if asyncio.current_task().cancelling():
+            raise
+        raise RuntimeError("추측 실행이 취소되었습니다") from None
+
+
+class SpeculativeExecutor:
+    """
+    입력 폼을 작성하는 동안, 필요한 필드가 이미 알려진 분석 단계를 백그라운드에서 미리 실행합니다.
+    별도 스레드의 이벤트 루프에서 실행되며, 결과는 단계 캐시에 저장됩니다.
+    제출 시 입력이 같으면 claim()으로 결과를 넘겨받고, 달라진 추측 실행은 취소합니다.
+    """
+
+    def __init__(self, api_key: str, cache: StageCache = STAGE_CACHE):
+        self.api_key = api_key
+        self.cache = cache
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="speculative-executor", daemon=True)
+        self._thread.start()
+        self._lock = threading.RLock()  # cancel()이 완료 콜백을 즉시 호출하므로 재진입 허용
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._owners: Dict[str, Set[str]] = {}
+        self._latest: Dict[tuple, str] = {}
+        self._tools = None
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def speculate(self, owner: str, known: Dict[str, Any]) -> None:
+        """
+        알려진 필드만으로 실행 가능한 분석 단계를 미리 시작합니다.
+        :param owner: 추측 실행을 요청한 세션 ID
+        :param known: 지금까지 입력된 필드 값 (current_date 포함)
+        """
+        for stage in ANALYSIS_STAGES:
+            if any(known.get(name) in (None, "") for name in STAGE_FIELDS[stage]):
+                continue
+            view = FieldView(stage, known)
+            key = stage_key(stage, view, stage_model(stage))
+            with self._lock:
+                previous = self._latest.get((owner, stage))
+                if previous == key:
+                    continue
+                if previous is not None:
+                    self._release(owner, previous)
+                self._latest[(owner, stage)] = key
+                if key in self._inflight:
+                    self._owners[key].add(owner)
+                    continue
+                if self.cache.get(key) is not None:
+                    continue
+                future = asyncio.run_coroutine_threadsafe(self._run(stage, view, key), self._loop)
+                self._inflight[key] = future
+                self._owners[key] = {owner}
+                self.started += 1
+            future.add_done_callback(lambda f, key=key: self._finished(key, f))
+            logging.info(f"'{stage}' 단계를 추측 실행합니다.")
+
+    def claim(self, owner: str, user_info: Any, current_date: str) -> Dict[str, Awaitable[str]]:
+        """
+        제출된 입력과 일치하는 추측 실행 결과를 넘겨받고, 일치하지 않는 것은 취소합니다.
+        :return: 단계 이름 -> 결과 awaitable (호출한 이벤트 루프에서 await 가능)
+        """
+        values = dict(vars(user_info), current_date=current_date)
+        claimed: Dict[str, Awaitable[str]] = {}
+        with self._lock:
+            for (session, stage), key in list(self._latest.items()):
+                if session != owner:
+                    continue
+                del self._latest[(session, stage)]
+                view = FieldView(stage, values)
+                expected = stage_key(stage, view, stage_model(stage))
+                if key == expected:
+                    self.hits += 1
+                    future = self._inflight.get(key)
+                    if future is not None:
+                        claimed[stage] = _await_speculation(future)
+                else:
+                    self.misses += 1
+                    self._release(owner, key)
+        if claimed:
+            logging.info(f"추측 실행 결과 사용: {', '.join(claimed)} (적중률 {self.hit_rate():.0%})")
+        return claimed
+
+    def discard(self, owner: str) -> None:
+        """세션의 모든 추측 실행을 취소합니다."""
+        with self._lock:
+            for (session, stage), key in list(self._latest.items()):
+                if session == owner:
+                    del self._latest[(session, stage)]
+                    self._release(owner, key)
+
+    def _release(self, owner: str, key: str) -> None:
+        # 다른 세션이 같은 추측 실행을 기다리고 있지 않을 때만 취소 (잠금 안에서 호출)
+        owners = self._owners.get(key)
+        if owners is None:
+            return
+        owners.discard(owner)
+        if not owners and self._inflight[key].cancel():
+            self.cancelled += 1
+
+    def _finished(self, key: str, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._owners.pop(key, None)
+            if not future.cancelled() and future.exception() is not None:
+                self.failed += 1
+                logging.warning(f"추측 실행 실패: {str(future.exception())}")
+
+    async def _run(self, stage: str, view: FieldView, key: str) -> str:
+        if self._tools is None:
+            self._tools = await asyncio.to_thread(create_tools)
+        agent = await create_agent(stage, self.api_key, view, view["current_date"], tools=self._tools)
+        await prepare_analysis_agent(agent, stage, view)
+        output = await run_analysis_stage(agent, stage, view)
+        self.cache.put(key, output)
+        return output
+
+    def hit_rate(self) -> float:
+        decided = self.hits + self.misses
+        return self.hits / decided if decided else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "started": self.started,
+                "hits": self.hits,
+                "misses": self.misses,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "in_flight": len(self._inflight),
+                "hit_rate": round(self.hit_rate(), 3),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for future in self._inflight.values():
+                future.cancel()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
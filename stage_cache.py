@@ -0,0 +1,105 @@
+# stage_cache.py
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+from config import STAGE_CACHE_SIZE
+
+# 단계별로 읽는 사용자 정보 필드
+# 각 단계의 에이전트 프롬프트와 입력은 이 필드만으로 구성되며(FieldView로 강제),
+# 단계 결과는 이 필드 값이 모두 같을 때만 재사용됩니다.
+STAGE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "user_analysis": ("gender", "height", "weight", "tpo", "situation", "current_date"),
+    "trend_analysis": ("gender", "current_date"),
+    "style_recommendations": ("gender", "height", "weight", "budget", "tpo", "situation", "current_date"),
+    "final_report": ("gender", "height", "weight", "budget", "situation", "current_date"),
+}
+
+
+class FieldView(Mapping):
+    """
+    단계가 선언한 필드만 노출하는 읽기 전용 사용자 정보입니다.
+    선언하지 않은 필드를 읽으면 KeyError가 발생하므로, 프롬프트가 새 필드를 사용하면
+    STAGE_FIELDS를 함께 갱신해야 캐시가 잘못된 결과를 재사용하지 않습니다.
+    """
+
+    def __init__(self, stage: str, values: Dict[str, Any]):
+        self._stage = stage
+        self._values = {name: values.get(name) for name in STAGE_FIELDS[stage]}
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._values:
+            raise KeyError(f"'{self._stage}' 단계는 '{name}' 필드를 사용하도록 선언되지 않았습니다 (STAGE_FIELDS 확인)")
+        return self._values[name]
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError as e:
+            raise AttributeError(str(e)) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+def stage_view(stage: str, user_info: Any, current_date: str) -> FieldView:
+    """사용자 정보(UserInput 또는 매핑)에서 해당 단계가 읽는 필드만 담은 FieldView를 만듭니다."""
+    values = dict(user_info) if isinstance(user_info, Mapping) else dict(vars(user_info))
+    return FieldView(stage, dict(values, current_date=current_date))
+
+
+def stage_key(stage: str, view: FieldView, model: str, upstream: Sequence[str] = ()) -> str:
+    """
+    단계 결과의 캐시 키를 계산합니다.
+    :param view: 단계가 읽는 필드 값
+    :param model: 단계에 사용된 모델 이름 (모델이 바뀌면 재계산)
+    :param upstream: 단계 입력에 포함되는 이전 단계 결과 (보고서 단계)
+    """
+    payload = json.dumps([stage, model, dict(view), list(upstream)], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StageCache:
+    """
+    단계별 결과를 메모하는 LRU 캐시입니다. Streamlit 세션(스레드) 간에 공유할 수 있도록 잠금을 사용합니다.
+    """
+
+    def __init__(self, maxsize: int = STAGE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, output: str) -> None:
+        with self._lock:
+            self._entries[key] = output
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# 프로세스 전체에서 공유하는 기본 캐시
+STAGE_CACHE = StageCache()
@@ -0,0 +1,264 @@
+# structured_output.py
+
+import json
+import logging
+import re
+from typing import Any, Dict, List, Mapping, Optional, Type, get_args, get_origin
+
+from pydantic import BaseModel, Field, ValidationError
+
+
+class StructuredOutputError(ValueError):
+    """에이전트 출력이 단계 스키마를 만족하지 않을 때 발생합니다."""
+
+
+class TrendItem(BaseModel):
+    name: str = Field(..., description="트렌드 이름")
+    description: str = Field(..., description="특징과 배경")
+    key_items: List[str] = Field(default_factory=list, description="대표 아이템")
+
+
+class ProductItem(BaseModel):
+    category: str = Field(..., description="상의/하의/아우터/신발/액세서리 중 하나")
+    brand: str = Field(..., description="한국에서 구매 가능한 브랜드명")
+    name: str = Field(..., description="정확한 제품명")
+    price: int = Field(..., ge=0, description="가격 (원, 숫자만)")
+    link: Optional[str] = Field(None, description="구매 링크")
+    reason: str = Field("", description="고객에게 적합한 이유")
+
+
+class UserAnalysis(BaseModel):
+    body_type: str = Field(..., description="체형 분류")
+    bmi: float = Field(..., gt=0, description="BMI 수치")
+    strengths: List[str] = Field(..., min_length=1, description="체형의 장점")
+    weaknesses: List[str] = Field(default_factory=list, description="체형의 보완점")
+    silhouettes: List[str] = Field(..., min_length=1, description="적합한 실루엣과 이유")
+    styling_strategies: List[str] = Field(..., min_length=1, description="체형 보완/강조 스타일링 전략")
+    avoid: List[str] = Field(default_factory=list, description="피해야 할 스타일과 이유")
+    personal_color: str = Field(..., description="추정 퍼스널 컬러 시즌과 근거")
+    color_palette: List[str] = Field(..., min_length=1, description="추천 색상")
+    tpo_styles: List[str] = Field(..., min_length=1, description="상황에 맞는 스타일 제안")
+
+
+class TrendAnalysis(BaseModel):
+    global_trends: List[TrendItem] = Field(..., min_length=1, description="글로벌 패션 트렌드")
+    korean_trends: List[TrendItem] = Field(default_factory=list, description="한국 패션 트렌드")
+    season_items: List[str] = Field(default_factory=list, description="현재 시즌 핵심 아이템")
+    style_icons: List[str] = Field(default_factory=list, description="참고할 연예인/인플루언서와 스타일 포인트")
+
+
+class StyleRecommendations(BaseModel):
+    concept: str = Field(..., description="전체 스타일 컨셉")
+    items: List[ProductItem] = Field(..., min_length=1, description="추천 아이템 (신발, 액세서리 포함)")
+    styling_tips: List[str] = Field(default_factory=list, description="스타일링 가이드")
+    budget_tips: List[str] = Field(default_factory=list, description="예산 최적화 팁")
+
+
+# 분석 단계별 출력 스키마
+STAGE_SCHEMAS: Dict[str, Type[BaseModel]] = {
+    "user_analysis": UserAnalysis,
+    "trend_analysis": TrendAnalysis,
+    "style_recommendations": StyleRecommendations,
+}
+
+
+def _skeleton(model: Type[BaseModel]) -> Dict[str, Any]:
+    """필드 설명으로 채운 출력 예시 구조를 만듭니다."""
+    skeleton = {}
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        inner = get_args(annotation)[0] if get_origin(annotation) in (list, List) else None
+        if inner is not None and isinstance(inner, type) and issubclass(inner, BaseModel):
+            skeleton[name] = [_skeleton(inner)]
+        elif inner is not None:
+            skeleton[name] = [field.description]
+        else:
+            skeleton[name] = field.description
+    return skeleton
+
+
+def format_instructions(stage: str) -> str:
+    """분석 에이전트의 프롬프트에 덧붙이는 출력 형식 지시문입니다."""
+    skeleton = json.dumps(_skeleton(STAGE_SCHEMAS[stage]), ensure_ascii=False, indent=1)
+    return (
+        "\n\n최종 응답은 '최종 응답:' 뒤에 아래 구조의 JSON 객체 하나로만 작성하세요. "
+        "설명 문장이나 코드 블록 표시는 넣지 말고, 값은 모두 한국어로 구체적으로 작성하세요.\n"
+        f"{skeleton}"
+    )
+
+
+def extract_json(text: str) -> Any:
+    """
+    LLM 응답에서 JSON 객체를 꺼냅니다 (코드 블록 표시와 앞뒤 설명 문장은 무시).
+    :raises StructuredOutputError: JSON 객체가 없거나 형식이 잘못된 경우
+    """
+    text = re.sub(r"```(?:json)?", "", text)
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        raise StructuredOutputError("JSON 객체를 찾을 수 없습니다.")
+    try:
+        return json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"JSON 형식 오류: {e.msg} (위치 {e.pos})") from None
+
+
+def parse_stage_output(stage: str, text: str) -> BaseModel:
+    """
+    단계 출력을 파싱하고 스키마로 검증합니다.
+    :raises StructuredOutputError: JSON이 아니거나 스키마를 만족하지 않는 경우
+    """
+    data = extract_json(text)
+    try:
+        return STAGE_SCHEMAS[stage].model_validate(data)
+    except ValidationError as e:
+        errors = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()[:5])
+        raise StructuredOutputError(f"스키마 검증 실패: {errors}") from None
+
+
+async def parse_with_repair(llm: Any, stage: str, text: str) -> BaseModel:
+    """
+    단계 출력을 검증하고, 실패하면 오류 내용을 알려 LLM에게 한 번 수정을 요청합니다.
+    :param llm: 수정 요청에 사용할 LLM (에이전트의 LLM)
+    """
+    try:
+        return parse_stage_output(stage, text)
+    except StructuredOutputError as e:
+        logging.warning(f"'{stage}' 단계 출력이 스키마와 맞지 않아 수정을 요청합니다: {str(e)}")
+        repair_prompt = (
+            f"다음 응답은 요구된 JSON 형식을 만족하지 않습니다.\n오류: {str(e)}\n\n"
+            f"응답:\n{text}\n\n"
+            f"내용은 유지하고 아래 구조에 맞는 JSON 객체 하나만 출력하세요.\n"
+            f"{json.dumps(_skeleton(STAGE_SCHEMAS[stage]), ensure_ascii=False)}"
+        )
+        repaired = await llm.ainvoke(repair_prompt)
+        return parse_stage_output(stage, getattr(repaired, "content", str(repaired)))
+
+
+def sample_output(stage: str, label: str = "") -> str:
+    """스키마를 만족하는 예시 출력입니다 (LLM_BACKEND=fake에서 사용)."""
+    def fill(model: Type[BaseModel]) -> Dict[str, Any]:
+        values = {}
+        for name, field in model.model_fields.items():
+            annotation = field.annotation
+            inner = get_args(annotation)[0] if get_origin(annotation) in (list, List) else None
+            if inner is not None and isinstance(inner, type) and issubclass(inner, BaseModel):
+                values[name] = [fill(inner)]
+            elif inner is not None:
+                values[name] = [f"{label} {field.description} 예시".strip()]
+            elif annotation is int:
+                values[name] = 50000
+            elif annotation is float:
+                values[name] = 22.5
+            else:
+                values[name] = f"{label} {field.description} 예시".strip()
+        return values
+    return json.dumps(fill(STAGE_SCHEMAS[stage]), ensure_ascii=False)
+
+
+def _bullets(items: List[str]) -> List[str]:
+    return [f"- {item}" for item in items]
+
+
+def _bmi(profile: Mapping[str, Any]) -> float:
+    return profile["weight"] / ((profile["height"] / 100) ** 2)
+
+
+def render_section(stage: str, data: BaseModel, profile: Optional[Mapping[str, Any]] = None) -> str:
+    """
+    단계의 구조화 출력을 Markdown으로 렌더링합니다.
+    :param profile: 사용자 정보 (키, 체중). 주어지면 BMI는 LLM이 답한 값 대신 입력으로 계산한 값을 표시합니다.
+    """
+    lines: List[str] = []
+    if isinstance(data, UserAnalysis):
+        bmi = _bmi(profile) if profile is not None else data.bmi
+        lines += [f"**체형**: {data.body_type} (BMI {bmi:.1f})", "", "**장점**"] + _bullets(data.strengths)
+        if data.weaknesses:
+            lines += ["", "**보완점**"] + _bullets(data.weaknesses)
+        lines += ["", "**추천 실루엣**"] + _bullets(data.silhouettes)
+        lines += ["", "**스타일링 전략**"] + _bullets(data.styling_strategies)
+        if data.avoid:
+            lines += ["", "**피해야 할 스타일**"] + _bullets(data.avoid)
+        lines += ["", f"**퍼스널 컬러**: {data.personal_color}", "", f"**추천 색상**: {', '.join(data.color_palette)}"]
+        lines += ["", "**TPO 스타일**"] + _bullets(data.tpo_styles)
+    elif isinstance(data, TrendAnalysis):
+        for title, trends in (("글로벌 트렌드", data.global_trends), ("한국 트렌드", data.korean_trends)):
+            if not trends:
+                continue
+            lines += [f"**{title}**"]
+            for trend in trends:
+                items = f" (대표 아이템: {', '.join(trend.key_items)})" if trend.key_items else ""
+                lines.append(f"- **{trend.name}**: {trend.description}{items}")
+            lines.append("")
+        if data.season_items:
+            lines += ["**시즌 핵심 아이템**"] + _bullets(data.season_items) + [""]
+        if data.style_icons:
+            lines += ["**참고 스타일**"] + _bullets(data.style_icons)
+    elif isinstance(data, StyleRecommendations):
+        lines += [f"**스타일 컨셉**: {data.concept}", ""]
+        lines += _item_table(data.items)
+        if data.styling_tips:
+            lines += ["", "**스타일링 가이드**"] + _bullets(data.styling_tips)
+        if data.budget_tips:
+            lines += ["", "**예산 팁**"] + _bullets(data.budget_tips)
+    return "\n".join(lines).strip()
+
+
+def _cell(text: str) -> str:
+    return text.replace("|", "/").replace("\n", " ")
+
+
+def _item_table(items: List[ProductItem]) -> List[str]:
+    lines = ["| 분류 | 브랜드 | 제품명 | 가격 | 링크 | 추천 이유 |", "|---|---|---|---:|---|---|"]
+    for item in items:
+        link = f"[구매]({item.link})" if item.link else "-"
+        lines.append(
+            f"| {_cell(item.category)} | {_cell(item.brand)} | {_cell(item.name)} | {item.price:,}원 | {link} | {_cell(item.reason)} |"
+        )
+    return lines
+
+
+def render_report(profile: Mapping[str, Any], analyses: Dict[str, Optional[BaseModel]]) -> str:
+    """
+    구조화된 분석 결과로 종합 보고서를 작성합니다 (LLM 호출 없음).
+    :param profile: 사용자 정보 (final_report 단계의 FieldView)
+    :param analyses: 단계 이름 -> 구조화 출력 (실패한 선택 단계는 None)
+    """
+    user: Optional[UserAnalysis] = analyses.get("user_analysis")
+    trend: Optional[TrendAnalysis] = analyses.get("trend_analysis")
+    style: Optional[StyleRecommendations] = analyses.get("style_recommendations")
+    bmi = _bmi(profile)
+
+    lines = [
+        f"# 패션 분석 및 추천 보고서 - {profile['situation']}",
+        "",
+        f"{profile['current_date']} 기준 · {profile['gender']} · {profile['height']}cm / {profile['weight']}kg "
+        f"(BMI {bmi:.1f}) · 예산 {profile['budget']:,}원",
+        "",
+        "## 1. 요약",
+    ]
+    if user is not None:
+        lines.append(f"- 체형: {user.body_type}, 퍼스널 컬러: {user.personal_color}")
+    if style is not None:
+        lines.append(f"- 스타일 컨셉: {style.concept}")
+    if trend is not None:
+        lines.append(f"- 주목할 트렌드: {', '.join(t.name for t in trend.global_trends[:3])}")
+
+    if user is not None:
+        lines += ["", "## 2. 고객 분석", "", render_section("user_analysis", user, profile)]
+    if trend is not None:
+        lines += ["", "## 3. 트렌드 분석", "", render_section("trend_analysis", trend)]
+    else:
+        lines += ["", "## 3. 트렌드 분석", "", "트렌드 분석을 완료하지 못해 이 보고서에는 포함되지 않았습니다."]
+
+    if style is not None:
+        total = sum(item.price for item in style.items)
+        budget = profile["budget"]
+        status = "예산 이내" if total <= budget else f"예산 {total - budget:,}원 초과"
+        lines += ["", "## 4. 스타일 추천", "", f"**스타일 컨셉**: {style.concept}", ""]
+        lines += _item_table(style.items)
+        lines += ["", f"**합계**: {total:,}원 / 예산 {budget:,}원 ({status})"]
+        if style.styling_tips:
+            lines += ["", "## 5. 스타일링 가이드"] + _bullets(style.styling_tips)
+        if style.budget_tips:
+            lines += ["", "## 6. 예산 최적화 팁"] + _bullets(style.budget_tips)
+    return "\n".join(lines).strip() + "\n"
@@ -0,0 +1,112 @@
+# test_admission_control.py
+
+import asyncio
+import random
+import threading
+
+import pytest
+
+from admission_control import AdmissionController, AdmissionRejected
+
+
+def test_admits_up_to_max_in_flight_then_queues_in_fifo_order():
+    controller = AdmissionController(max_in_flight=2, max_queue=10)
+    tickets = [controller.enqueue() for _ in range(5)]
+    assert [t.admitted for t in tickets] == [True, True, False, False, False]
+    assert [controller.position(t) for t in tickets] == [0, 0, 1, 2, 3]
+    assert controller.overloaded
+
+    controller.release(tickets[1])
+    assert [t.admitted for t in tickets[2:]] == [True, False, False]
+    controller.release(tickets[0])
+    controller.release(tickets[2])
+    assert tickets[3].admitted and tickets[4].admitted
+    assert not controller.overloaded
+    assert controller.stats()["in_flight"] == 2
+
+
+def test_reject_policy_sheds_when_queue_is_full():
+    controller = AdmissionController(max_in_flight=1, max_queue=2, shed_policy="reject")
+    tickets = [controller.enqueue() for _ in range(3)]
+    with pytest.raises(AdmissionRejected):
+        controller.enqueue()
+    assert controller.stats()["rejected"] == 1
+
+    # 대기열에 자리가 나면 다시 받음
+    controller.release(tickets[0])
+    assert not controller.enqueue().downgraded
+
+
+def test_downgrade_policy_queues_up_to_twice_the_limit():
+    controller = AdmissionController(max_in_flight=1, max_queue=2, shed_policy="downgrade")
+    tickets = [controller.enqueue() for _ in range(5)]
+    assert [t.downgraded for t in tickets] == [False, False, False, True, True]
+    with pytest.raises(AdmissionRejected):
+        controller.enqueue()
+    stats = controller.stats()
+    assert (stats["queued"], stats["downgraded"], stats["rejected"]) == (4, 2, 1)
+
+
+def test_zero_queue_admits_while_slot_is_free():
+    controller = AdmissionController(max_in_flight=1, max_queue=0)
+    assert controller.enqueue().admitted
+    with pytest.raises(AdmissionRejected):
+        controller.enqueue()
+
+
+def test_release_while_queued_removes_ticket_without_freeing_a_slot():
+    controller = AdmissionController(max_in_flight=1, max_queue=5)
+    running, waiting, last = (controller.enqueue() for _ in range(3))
+    controller.release(waiting)
+    controller.release(waiting)  # 중복 호출은 무시
+    assert controller.position(last) == 1
+    assert not last.admitted
+    assert controller.stats()["in_flight"] == 1
+
+    controller.release(running)
+    assert last.admitted and not waiting.admitted
+
+
+def test_wait_admitted_reports_positions():
+    controller = AdmissionController(max_in_flight=1, max_queue=5)
+    running = controller.enqueue()
+    waiting = controller.enqueue()
+    positions = []
+
+    async def scenario():
+        task = asyncio.create_task(controller.wait_admitted(waiting, positions.append, interval=0.01))
+        await asyncio.sleep(0.05)
+        controller.release(running)
+        await asyncio.wait_for(task, 1)
+
+    asyncio.run(scenario())
+    assert positions == [1, 0]
+
+
+def test_concurrent_requests_never_exceed_in_flight_bound():
+    controller = AdmissionController(max_in_flight=3, max_queue=100)
+    peak, active, lock = [0], [0], threading.Lock()
+
+    def worker():
+        ticket = controller.enqueue()
+        while not ticket.admitted:
+            if random.random() < 0.01:
+                controller.release(ticket)  # 대기 중 취소
+                return
+            threading.Event().wait(0.001)
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        threading.Event().wait(0.002)
+        with lock:
+            active[0] -= 1
+        controller.release(ticket)
+
+    threads = [threading.Thread(target=worker) for _ in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] <= 3
+    stats = controller.stats()
+    assert (stats["in_flight"], stats["queued"]) == (0, 0)
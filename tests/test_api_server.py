@@ -0,0 +1,93 @@
+# test_api_server.py
+
+import asyncio
+import json
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from api_server import create_app, parse_user_info
+
+PAYLOAD = {"gender": "여성", "height": 165, "weight": 55.5, "budget": 300000, "tpo": "결혼식 하객", "situation": "봄 야외 결혼식"}
+
+
+def _run(scenario, workers=1, queue_size=4):
+    async def main():
+        async with TestClient(TestServer(create_app("", workers=workers, queue_size=queue_size))) as client:
+            await scenario(client)
+    asyncio.run(main())
+
+
+def test_parse_user_info_casts_fields():
+    user_info = parse_user_info(dict(PAYLOAD, height="170.5", budget=120000.0))
+    assert (user_info.height, user_info.weight, user_info.budget) == (170.5, 55.5, 120000)
+    assert user_info.image_paths == []
+
+
+@pytest.mark.parametrize("changes", [
+    {"height": True},
+    {"budget": False},
+    {"height": float("nan")},
+    {"weight": "inf"},
+    {"height": 139},
+    {"height": 201},
+    {"weight": 20},
+    {"weight": 151},
+    {"budget": 0},
+    {"budget": -1000},
+    {"gender": 1},
+    {"tpo": " "},
+    {"situation": None},
+    {"budget": [1000]},
+])
+def test_parse_user_info_rejects_invalid_values(changes):
+    with pytest.raises(ValueError):
+        parse_user_info(dict(PAYLOAD, **changes))
+
+
+def test_submit_stream_and_result(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def scenario(client):
+        response = await client.post("/recommendations", json=PAYLOAD)
+        assert response.status == 202
+        job_id = (await response.json())["job_id"]
+
+        stream = await client.get(f"/recommendations/{job_id}/stream")
+        assert stream.status == 200
+        events = [json.loads(line) for line in (await stream.text()).splitlines()]
+        assert events[-1]["event"] == "completed"
+        streamed = [e["stage"] for e in events if e["event"] == "stage_completed"]
+        assert "final_report" in streamed
+
+        result = await client.get(f"/recommendations/{job_id}/result")
+        assert result.status == 200
+        body = await result.json()
+        assert body["status"] == "completed"
+        assert set(streamed) <= set(body["results"])
+
+        missing = await client.get("/recommendations/unknown/result")
+        assert missing.status == 404
+
+    _run(scenario)
+
+
+def test_full_queue_returns_503():
+    async def scenario(client):
+        # 워커가 없으므로 첫 작업이 대기열에 남아 있음
+        assert (await client.post("/recommendations", json=PAYLOAD)).status == 202
+        response = await client.post("/recommendations", json=PAYLOAD)
+        assert response.status == 503
+        assert response.headers["Retry-After"] == "5"
+
+    _run(scenario, workers=0, queue_size=1)
+
+
+@pytest.mark.parametrize("body", [b"not json", b"[1, 2]", json.dumps(dict(PAYLOAD, height=True)).encode("utf-8")])
+def test_bad_body_returns_400(body):
+    async def scenario(client):
+        response = await client.post("/recommendations", data=body, headers={"Content-Type": "application/json"})
+        assert response.status == 400
+        assert "error" in await response.json()
+
+    _run(scenario, workers=0)
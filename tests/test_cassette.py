@@ -0,0 +1,22 @@
+# test_cassette.py
+
+import os
+
+from cassette import Cassette
+
+
+def test_save_and_replay_roundtrip(tmp_path):
+    path = str(tmp_path / "run.json")
+    cassette = Cassette(path, "record")
+    key = cassette.key("llm", "model", "질문")
+    cassette.record(key, "질문", "답변", 0.25)
+    cassette.save()
+
+    # 원자적 저장: 임시 파일이 남지 않고 권한은 umask를 따름
+    assert os.listdir(tmp_path) == ["run.json"]
+    umask = os.umask(0)
+    os.umask(umask)
+    assert os.stat(path).st_mode & 0o777 == 0o666 & ~umask
+
+    replayed = Cassette(path, "replay")
+    assert replayed.replay(key, "질문") == ("답변", 0.0)
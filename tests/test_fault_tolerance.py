@@ -0,0 +1,42 @@
+# test_fault_tolerance.py
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from fault_tolerance import RateLimitError, StageCheckpoint, retry_with_exponential_backoff
+
+
+def test_retry_keeps_last_transient_error():
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        raise ConnectionError(f"connection reset #{len(attempts)}")
+
+    with pytest.raises(RateLimitError, match="transient errors: connection reset #3") as info:
+        asyncio.run(retry_with_exponential_backoff(flaky, max_retries=3, base_delay=0, max_delay=0))
+    assert isinstance(info.value.__cause__, ConnectionError)
+    assert len(attempts) == 3
+
+
+def test_retry_does_not_retry_permanent_errors():
+    async def broken():
+        raise KeyError("missing")
+
+    with pytest.raises(KeyError):
+        asyncio.run(retry_with_exponential_backoff(broken, base_delay=0, max_delay=0))
+
+
+def test_sweep_removes_only_stale_checkpoints(tmp_path):
+    stale, fresh = tmp_path / "stale.json", tmp_path / "fresh.json"
+    stale.write_text("{}")
+    fresh.write_text("{}")
+    old = time.time() - 3600
+    os.utime(stale, (old, old))
+
+    StageCheckpoint.sweep(str(tmp_path), ttl=60)
+    assert sorted(os.listdir(tmp_path)) == ["fresh.json"]
+    StageCheckpoint.sweep(str(tmp_path / "missing"), ttl=60)
@@ -0,0 +1,66 @@
+# test_outfit_optimizer.py
+
+import itertools
+
+import numpy as np
+import pytest
+
+from outfit_optimizer import optimize_outfits
+
+
+def _brute_force(candidates, budget, top_k, optional):
+    """모든 조합을 나열해 예산 내 상위 top_k개 점수를 구합니다."""
+    choices = []
+    for category, (prices, scores) in candidates.items():
+        options = [(int(p), float(s)) for p, s in zip(prices, scores)]
+        if category in optional:
+            options.append((0, 0.0))
+        choices.append(options)
+    totals = sorted(
+        (sum(s for _, s in combo) for combo in itertools.product(*choices) if sum(p for p, _ in combo) <= budget),
+        reverse=True,
+    )
+    return totals[:top_k]
+
+
+def _check(outfits, candidates, budget):
+    for outfit in outfits:
+        total = sum(int(candidates[c][0][i]) for c, i in outfit.items.items())
+        score = sum(float(candidates[c][1][i]) for c, i in outfit.items.items())
+        assert outfit.total_price == total <= budget
+        assert outfit.score == pytest.approx(score)
+
+
+def test_odd_prices_near_budget_are_not_dropped():
+    candidates = {
+        "top": (np.array([333_334, 333_333]), np.array([5.0, 5.0])),
+        "bottom": (np.array([333_333, 333_333]), np.array([5.0, 5.0])),
+        "shoes": (np.array([333_333, 333_333]), np.array([5.0, 5.0])),
+    }
+    outfits = optimize_outfits(candidates, 1_000_000, top_k=3, optional_categories=set())
+    assert [o.score for o in outfits] == [15.0, 15.0, 15.0]
+    _check(outfits, candidates, 1_000_000)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    budget = int(rng.integers(50_000, 400_000))
+    candidates = {}
+    for category in ("top", "bottom", "outer", "shoes"):
+        size = int(rng.integers(1, 6))
+        prices = rng.integers(5_000, budget // 2, size=size)
+        if seed % 2:
+            prices = prices // 100 * 100 + 90  # 39,990원처럼 단위에 맞지 않는 가격
+        candidates[category] = (prices, rng.integers(1, 6, size=size).astype(float))
+    top_k = int(rng.integers(1, 6))
+
+    outfits = optimize_outfits(candidates, budget, top_k=top_k, optional_categories={"outer"}, price_unit=1000)
+    expected = _brute_force(candidates, budget, top_k, {"outer"})
+    assert [o.score for o in outfits] == pytest.approx(expected)
+    _check(outfits, candidates, budget)
+
+
+def test_required_category_without_affordable_candidate():
+    candidates = {"top": (np.array([10_000]), np.array([1.0])), "bottom": (np.array([90_000]), np.array([1.0]))}
+    assert optimize_outfits(candidates, 50_000, optional_categories=set()) == []
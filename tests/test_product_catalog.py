@@ -0,0 +1,61 @@
+# test_product_catalog.py
+
+import math
+
+import pytest
+
+from product_catalog import ProductCatalog, _parse_price, create_catalog_tool, parse_tool_input
+
+RECORDS = [
+    {"product_id": "p1", "name": "옥스퍼드 셔츠", "brand": "A", "category": "상의", "gender": "남성",
+     "price": "39,900원", "color": "화이트", "tpo_tags": "출근|결혼식"},
+    {"product_id": "p2", "name": "린넨 셔츠", "brand": "B", "category": "상의", "gender": "공용",
+     "price": 59900.0, "color": "네이비", "tpo_tags": "여행"},
+    {"product_id": "p3", "name": "가격 미정 셔츠", "brand": "C", "category": "상의", "gender": "남성",
+     "price": "", "color": "블랙", "tpo_tags": "출근"},
+    {"product_id": "p4", "name": "문의 셔츠", "brand": "C", "category": "상의", "gender": "남성",
+     "price": "가격 문의", "color": "블랙", "tpo_tags": "출근"},
+]
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("39,900원", 39900),
+    ("₩39,900", 39900),
+    ("39900.0", 39900),
+    (39900.0, 39900),
+    ("12,000.6", 12001),
+    (15000, 15000),
+    ("KRW 1,200,000", 1200000),
+])
+def test_parse_price_strips_currency_and_separators(value, expected):
+    assert _parse_price(value) == expected
+
+
+@pytest.mark.parametrize("value", [None, "", "가격 문의", "-5000", float("nan"), math.inf, True, "1-2"])
+def test_parse_price_rejects_invalid_values(value):
+    assert _parse_price(value) is None
+
+
+def test_catalog_drops_rows_without_valid_price():
+    catalog = ProductCatalog(RECORDS)
+    assert catalog.size == 2
+    assert [p["product_id"] for p in catalog.query(max_price=100000)] == ["p1", "p2"]
+    assert catalog.query(max_price=1000) == []
+
+
+def test_parse_tool_input_keeps_commas_inside_values():
+    params = parse_tool_input("category=상의, tpo=결혼식, 하객, max_price=100,000, color=네이비")
+    assert params == {"category": "상의", "tpo": "결혼식, 하객", "max_price": "100,000", "color": "네이비"}
+
+
+def test_parse_tool_input_accepts_json_and_newlines():
+    assert parse_tool_input('{"category": "하의", "limit": 3}') == {"category": "하의", "limit": "3"}
+    assert parse_tool_input("category=신발\ngender = 여성") == {"category": "신발", "gender": "여성"}
+
+
+def test_catalog_tool_uses_parsed_filters():
+    tool = create_catalog_tool(ProductCatalog(RECORDS))
+    result = tool.run("category=상의, tpo=결혼식, 출근, max_price=50,000")
+    assert "옥스퍼드 셔츠" in result and "39,900원" in result
+    assert "린넨 셔츠" not in result
+    assert "올바르지 않습니다" in tool.run("max_price=많이")
@@ -0,0 +1,44 @@
+# test_retrieval_index.py
+
+import json
+import time
+
+from langchain.tools import Tool
+
+from retrieval_index import CACHE_TTL_SECONDS, LocalKnowledgeBase
+
+
+def test_latest_result_is_reused_after_reopen(tmp_path):
+    kb = LocalKnowledgeBase(str(tmp_path))
+    kb.ingest("DuckDuckGo Search", "Linen Shirt!", "old result.")
+    kb.ingest("DuckDuckGo Search", "linen shirt", "new result.")
+    assert kb.lookup("DuckDuckGo Search", "LINEN  shirt") == "new result."
+    assert kb.lookup("YouTube Search", "linen shirt") is None
+
+    reopened = LocalKnowledgeBase(str(tmp_path))
+    assert reopened.lookup("DuckDuckGo Search", "linen shirt") == "new result."
+    assert "new result." in reopened.as_tool().run("linen shirt")
+
+
+def test_expired_and_partial_records_are_ignored(tmp_path):
+    log = tmp_path / "queries.jsonl"
+    expired = {"source": "Arxiv", "query": "fashion", "result": "stale", "fetched_at": time.time() - CACHE_TTL_SECONDS - 1}
+    log.write_bytes((json.dumps(expired) + "\n").encode("utf-8") + b'{"source": "Arx')
+
+    kb = LocalKnowledgeBase(str(tmp_path))
+    assert kb.lookup("Arxiv", "fashion") is None
+    kb.ingest("Arxiv", "fashion", "fresh")
+    assert LocalKnowledgeBase(str(tmp_path)).lookup("Arxiv", "fashion") == "fresh"
+    assert len(log.read_bytes().splitlines()) == 2
+
+
+def test_cached_tool_calls_underlying_tool_once(tmp_path):
+    calls = []
+
+    def search(query: str) -> str:
+        calls.append(query)
+        return f"result for {query}."
+
+    tool = LocalKnowledgeBase(str(tmp_path)).cached_tool(Tool(name="DuckDuckGo Search", func=search, description="검색"))
+    assert tool.run("minimal outfit") == tool.run("Minimal outfit?") == "result for minimal outfit."
+    assert calls == ["minimal outfit"]
@@ -0,0 +1,62 @@
+# test_scratchpad.py
+
+from langchain.schema import AgentAction
+
+from scratchpad import compact_observation, format_compacted_scratchpad, summarize_step
+
+LONG_OBSERVATION = "Oversized blazers are trending. " * 5 + " ".join(
+    f"Result {i} about fashion item number {i} with details." for i in range(200)
+)
+
+
+def _step(tool_input: str, observation: str) -> tuple:
+    action = AgentAction(tool="Search", tool_input=tool_input, log=f"도구 사용: Search\n도구 입력: {tool_input}")
+    return action, observation
+
+
+def test_short_observation_is_kept():
+    assert compact_observation("First result. Second result.", "q", set(), 100) == "First result. Second result."
+
+
+def test_duplicates_are_removed_within_and_across_observations():
+    seen = set()
+    first = compact_observation("Same line. Same line. Other line.", "q", seen, 100)
+    assert first == "Same line. Other line."
+    assert compact_observation("same LINE! Other line.", "q", seen, 100) == "(이전 결과와 같은 내용)"
+
+
+def test_output_stays_within_budget_including_suffix():
+    for budget in (20, 40, 100, 300, 1500):
+        output = compact_observation(LONG_OBSERVATION, "blazer trend", set(), budget)
+        assert len(output) <= budget
+    # 단어가 없어 조각으로 나눌 수 없는 결과도 예산을 넘지 않음
+    assert len(compact_observation("— " * 2000, "blazer trend", set(), 100)) <= 100
+
+
+def test_relevant_segments_are_preferred_in_original_order():
+    observation = " ".join(f"Filler sentence number {i}." for i in range(30)) + " Linen shirts suit summer weddings."
+    output = compact_observation(observation, "linen shirts", set(), 200)
+    assert "Linen shirts suit summer weddings." in output
+    assert output.index("Filler sentence number 0.") < output.index("Linen shirts")
+    assert output.endswith("개 생략)")
+
+
+def test_older_steps_are_summarized():
+    steps = [_step(f"query {i}", f"Unique result {i}. " + "x" * 500) for i in range(4)]
+    scratchpad = format_compacted_scratchpad(steps, recent_steps=2, observation_budget=100, summary_budget=50)
+    assert "(이전 단계 요약)" in scratchpad
+    assert "- Search(query 0):" in scratchpad and "- Search(query 1):" in scratchpad
+    # 최근 두 단계만 원래 형식으로 남음
+    assert scratchpad.count("Observation: ") == 2
+    assert "도구 입력: query 0" not in scratchpad and "도구 입력: query 3" in scratchpad
+
+
+def test_scratchpad_without_steps_is_empty():
+    assert format_compacted_scratchpad([]) == ""
+
+
+def test_summarize_step_truncates():
+    action, observation = _step("q" * 100, "y " * 200)
+    line = summarize_step(action, observation, budget=30)
+    assert line.startswith("- Search(") and line.endswith("…")
+    assert len(line) < 120
@@ -0,0 +1,105 @@
+# test_tool_planner.py
+
+import asyncio
+import json
+import time
+
+from langchain.tools import Tool
+
+import pipeline
+from agent_config import tools_for_agent
+from config import FakeChatModel
+from fault_tolerance import RateLimitError, retry_with_exponential_backoff
+from tool_planner import gather_tool_context, plan_tool_queries, run_tool_queries
+from user_input import UserInput
+
+
+def _tool(name: str, delay: float = 0.0) -> Tool:
+    def run(query: str) -> str:
+        time.sleep(delay)
+        return f"{name} result for {query}."
+    return Tool(name=name, func=run, description=f"{name} 검색")
+
+
+TOOLS = [_tool("DuckDuckGo Search"), _tool("YouTube Search"), _tool("Arxiv"), _tool("Outfit Optimizer"),
+         _tool("Product Catalog")]
+
+
+def _plan(*queries) -> FakeChatModel:
+    payload = {"queries": [{"tool": tool, "query": query} for tool, query in queries]}
+    return FakeChatModel(responses=[json.dumps(payload, ensure_ascii=False)])
+
+
+def test_plan_drops_unknown_non_search_and_duplicate_queries():
+    llm = _plan(("DuckDuckGo Search", "린넨 셔츠"), ("DuckDuckGo Search", " 린넨  셔츠 "), ("Nope", "x"),
+                ("Outfit Optimizer", "budget=300000"), ("Product Catalog", "린넨 셔츠"), ("Arxiv", "소비자 행동"))
+    queries = asyncio.run(plan_tool_queries(llm, "스타일리스트", "작업", TOOLS))
+    assert [(q.tool, q.query) for q in queries] == [("DuckDuckGo Search", "린넨 셔츠"), ("Arxiv", "소비자 행동")]
+
+
+def test_plan_is_capped():
+    llm = _plan(*[("DuckDuckGo Search", f"검색 {i}") for i in range(10)])
+    assert len(asyncio.run(plan_tool_queries(llm, "r", "t", TOOLS, max_queries=3))) == 3
+
+
+def test_plan_accepts_code_block():
+    llm = FakeChatModel(responses=['```json\n{"queries": [{"tool": "Arxiv", "query": "q"}]}\n```'])
+    assert [q.tool for q in asyncio.run(plan_tool_queries(llm, "r", "t", TOOLS))] == ["Arxiv"]
+
+
+def test_unparseable_plan_falls_back_to_no_context():
+    for response in ("검색이 필요 없습니다.", '{"queries": [{"tool": "Arxiv"}]}', '{"queries": "x"'):
+        llm = FakeChatModel(responses=[response])
+        assert asyncio.run(gather_tool_context(llm, "r", "t", TOOLS)) == ""
+
+
+def test_queries_run_in_parallel_and_timeouts_are_reported():
+    tools = [_tool("DuckDuckGo Search", 0.3), _tool("YouTube Search", 0.3), _tool("Arxiv", 2.0)]
+    llm = _plan(("DuckDuckGo Search", "a"), ("YouTube Search", "b"), ("Arxiv", "c"))
+
+    async def run():
+        queries = await plan_tool_queries(llm, "r", "t", tools)
+        return await run_tool_queries(queries, tools, timeout=0.6)
+
+    started = time.monotonic()
+    results = dict((q.tool, output) for q, output in asyncio.run(run()))
+    assert time.monotonic() - started < 1.0
+    assert results["DuckDuckGo Search"] == "DuckDuckGo Search result for a."
+    assert results["Arxiv"] == "검색 실패 (TimeoutError)"
+
+
+def test_tool_allow_lists():
+    tools = TOOLS + [_tool("Product Catalog"), _tool("Local Knowledge Search")]
+    names = lambda agent: {tool.name for tool in tools_for_agent(agent, tools)}
+    assert "Arxiv" not in names("stylist") and "Outfit Optimizer" in names("stylist")
+    assert "Outfit Optimizer" not in names("trend_analyst") and "Arxiv" in names("trend_analyst")
+    assert "Outfit Optimizer" not in names("report_agent")
+    assert names("unknown_agent") == {tool.name for tool in tools}
+
+
+def test_planning_runs_once_per_analysis_stage_outside_retry(monkeypatch):
+    planned, attempts = [], {}
+
+    async def fake_gather(llm, role, task, tools):
+        planned.append(role)
+        return ""
+
+    async def flaky_stage(agent, stage, view):
+        attempts[stage] = attempts.get(stage, 0) + 1
+        if attempts[stage] == 1:
+            raise RateLimitError("rate limit")
+        return "결과 " * 60
+
+    monkeypatch.setattr(pipeline, "REPORT_MODE", "llm")
+    monkeypatch.setattr(pipeline, "TOOL_PLANNING", True)
+    monkeypatch.setattr(pipeline, "gather_tool_context", fake_gather)
+    monkeypatch.setattr(pipeline, "run_analysis_stage", flaky_stage)
+    monkeypatch.setattr(pipeline, "retry_with_exponential_backoff",
+                        lambda coroutine: retry_with_exponential_backoff(coroutine, base_delay=0, max_delay=0))
+    user_info = UserInput(gender="남성", height=170, weight=65, budget=300000, situation="데이트", tpo="주말", image_paths=[])
+
+    results = asyncio.run(pipeline.run_pipeline("", user_info, "2026년 10월 19일", tools=[]))
+    assert all(count == 2 for count in attempts.values())
+    assert len(planned) == len(pipeline.ANALYSIS_STAGES)
+    assert "리포트 작성자" not in planned
+    assert pipeline.REPORT_STAGE in results
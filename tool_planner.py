@@ -0,0 +1,108 @@
+# tool_planner.py
+
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Sequence, Set, Tuple
+
+from langchain.tools import Tool
+from pydantic import BaseModel, Field, ValidationError
+
+from config import PLANNER_MAX_QUERIES, PLANNER_TOOL_TIMEOUT, PLANNER_TOOL_WORKERS
+from prompts import TOOL_PLANNER_PROMPT
+from scratchpad import compact_observation
+from structured_output import StructuredOutputError, extract_json
+
+# 검색 계획에 사용하지 않는 도구 (검색어가 아닌 "key=value" 형식의 구조화된 입력을 받는 도구)
+NON_SEARCH_TOOLS = {"Outfit Optimizer", "Product Catalog"}
+
+# 계획된 검색 전용 스레드 풀. 시간이 초과된 도구 호출은 스레드를 중단할 수 없으므로,
+# 기본 실행기(asyncio.to_thread) 대신 크기가 제한된 별도 풀을 사용해 다른 작업의 스레드가 고갈되지 않게 함
+_TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=PLANNER_TOOL_WORKERS, thread_name_prefix="tool-planner")
+
+
+class ToolQuery(BaseModel):
+    tool: str = Field(..., description="도구 이름")
+    query: str = Field(..., min_length=1, description="검색어")
+
+
+class ToolPlan(BaseModel):
+    queries: List[ToolQuery] = Field(default_factory=list)
+
+
+def _searchable(tools: Sequence[Tool]) -> List[Tool]:
+    return [tool for tool in tools if tool.name not in NON_SEARCH_TOOLS]
+
+
+async def plan_tool_queries(llm: Any, role: str, task: str, tools: Sequence[Tool],
+                            max_queries: int = PLANNER_MAX_QUERIES) -> List[ToolQuery]:
+    """
+    LLM 한 번의 호출로 작업에 필요한 검색을 계획합니다.
+    계획을 해석할 수 없으면 빈 목록을 반환하여 에이전트가 기존처럼 도구를 직접 사용하게 합니다.
+    """
+    searchable = _searchable(tools)
+    if not searchable or max_queries <= 0:
+        return []
+    prompt = TOOL_PLANNER_PROMPT.format(
+        role=role,
+        task=task,
+        tools="\n".join(f"- {tool.name}: {tool.description}" for tool in searchable),
+        max_queries=max_queries,
+    )
+    response = await llm.ainvoke(prompt)
+    try:
+        plan = ToolPlan.model_validate(extract_json(getattr(response, "content", str(response))))
+    except (StructuredOutputError, ValidationError) as e:
+        logging.warning(f"검색 계획을 해석할 수 없어 계획 없이 진행합니다: {str(e).splitlines()[0]}")
+        return []
+
+    names = {tool.name for tool in searchable}
+    queries, seen = [], set()
+    for item in plan.queries:
+        key = (item.tool, " ".join(item.query.lower().split()))
+        if item.tool not in names or key in seen:
+            continue
+        seen.add(key)
+        queries.append(item)
+    return queries[:max_queries]
+
+
+async def run_tool_queries(queries: Sequence[ToolQuery], tools: Sequence[Tool],
+                           timeout: float = PLANNER_TOOL_TIMEOUT) -> List[Tuple[ToolQuery, str]]:
+    """
+    계획된 검색을 전용 스레드 풀에서 병렬로 실행합니다. 실패하거나 시간이 초과된 검색은 오류 내용을 결과로 남깁니다.
+    풀이 모두 사용 중이면 대기하던 검색도 제한 시간이 지나면 실행되지 않고 취소됩니다.
+    """
+    by_name = {tool.name: tool for tool in tools}
+    loop = asyncio.get_running_loop()
+
+    async def run(query: ToolQuery) -> str:
+        try:
+            call = loop.run_in_executor(_TOOL_EXECUTOR, by_name[query.tool].run, query.query)
+            return str(await asyncio.wait_for(call, timeout))
+        except Exception as e:
+            logging.warning(f"[{query.tool}] '{query.query}' 검색 실패: {str(e) or type(e).__name__}")
+            return f"검색 실패 ({type(e).__name__})"
+
+    results = await asyncio.gather(*(run(query) for query in queries))
+    return list(zip(queries, results))
+
+
+def format_tool_results(results: Sequence[Tuple[ToolQuery, str]]) -> str:
+    """검색 결과를 에이전트 프롬프트에 넣을 형태로 정리합니다 (스크래치패드와 같은 방식으로 중복 제거 및 압축)."""
+    seen: Set[str] = set()
+    blocks = [f"[{query.tool}] {query.query}\n{compact_observation(result, query.query, seen)}" for query, result in results]
+    return "\n\n".join(blocks)
+
+
+async def gather_tool_context(llm: Any, role: str, task: str, tools: Sequence[Tool]) -> str:
+    """
+    검색을 계획하고 병렬로 실행한 결과를 반환합니다 (계획된 검색이 없으면 빈 문자열).
+    ReAct 반복에서 검색마다 LLM을 호출하는 대신, 계획 1회와 병렬 도구 호출로 필요한 정보를 모읍니다.
+    """
+    queries = await plan_tool_queries(llm, role, task, tools)
+    if not queries:
+        return ""
+    logging.info(f"[{role}] 검색 {len(queries)}건을 병렬로 실행합니다: {json.dumps([q.model_dump() for q in queries], ensure_ascii=False)}")
+    return format_tool_results(await run_tool_queries(queries, tools))